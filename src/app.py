@@ -6,15 +6,15 @@ Dependencies:
     - streamlit
     - altair
     - pandas
-    - pickle
-    - sqlalchemy
+    - pyarrow
 """
 
+import importlib
 import streamlit as st
 import altair as alt
-from st_pages import EV_Infrastructure, EVSales, emissions, home, EV_Prices_DE, EV_em_and_sales
-import pandas as pd
-import pickle as pkl
+import data_utils.chart_cache as chart_cache
+import data_utils.data_access as data_access
+import data_utils.tracing as tracing
 
 # Set up the Streamlit page configuration
 st.set_page_config(
@@ -24,9 +24,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Define the KPIs and corresponding table names
-kpis = ["EV infrastructure", "EV sales", "Fossil fuel emissions by cars", "EV prices", "EV Emissions and sales"]
-table_names = [table_name.replace(" ", "") for table_name in kpis]
+# Define the KPIs with their page title and module in st_pages; a page module (and the
+# charting libraries it uses) is only imported when its KPI is first selected
+PAGES = {
+    "---": (None, "home"),
+    "EV infrastructure": ("EV Infrastructure", "EV_Infrastructure"),
+    "EV sales": ("Increasing EV adoption - EV Sales", "EVSales"),
+    "EV electric usage": ("Increasing EV adoption - Electric usage by EVs", "emissions"),
+    "EV prices": ("Increasing EV adoption - EV prices", "EV_Prices_DE"),
+    "EV Emissions and sales": ("EV Emissions and sales", "EV_em_and_sales"),
+}
 
 # Enable dark theme for Altair charts
 alt.themes.enable("dark")
@@ -34,38 +41,25 @@ alt.themes.enable("dark")
 # Create layout columns
 col = st.columns((1.5, 6, 2), gap='medium')
 
-# Load preprocessed data from pickle file
-imported_data = pkl.load(open("data/temp_export.pkl", "rb"))
-imported_data = {key.replace(" ", ""): value for key, value in imported_data.items()}
-imported_data["EVEmissionsandsales"] = pd.read_csv("data/EV_em_and_sales.csv")
-
 # Sidebar configuration
 with st.sidebar:
     st.title("Electric Vehicle Dashboard")
-    kpis.insert(0, "---")
-    kpis[3] = "EV electric usage"
-    selected_kpi = st.selectbox("Select a KPI", kpis)
-
-# Main content based on selected KPI
-if selected_kpi == "---":
-    home.main()
-
-elif selected_kpi == "EV infrastructure":
-    st.title("EV Infrastructure")
-    EV_Infrastructure.main(imported_data[table_names[0]])
+    selected_kpi = st.selectbox("Select a KPI", list(PAGES))
 
-elif selected_kpi == "EV sales":
-    st.title("Increasing EV adoption - EV Sales")
-    EVSales.main(imported_data[table_names[1]])
+# The refresh worker publishes the first snapshot in the background after the first start
+if selected_kpi != "---" and not data_access.data_available():
+    st.info("The data is being prepared in the background, please check back in a few minutes.")
+    st.stop()
 
-elif selected_kpi == "EV electric usage":
-    st.title("Increasing EV adoption - Electric usage by EVs")
-    emissions.main(imported_data[table_names[2]])
+# Main content based on selected KPI (timed per rerun when DSS_TRACE is set)
+tracing.start_rerun(selected_kpi)
+title, module_name = PAGES[selected_kpi]
+if title:
+    st.title(title)
+with tracing.span(f"page:{module_name}", 'page'):
+    importlib.import_module(f"st_pages.{module_name}").main()
 
-elif selected_kpi == "EV prices":
-    st.title("Increasing EV adoption - EV prices")
-    EV_Prices_DE.main(imported_data[table_names[3]])
+# Debug panel with the timing breakdown of this rerun
+if tracing.ENABLED:
+    tracing.render_debug_panel({'Chart': chart_cache.stats(), 'Table': data_access.cache_stats()})
 
-elif selected_kpi == "EV Emissions and sales":
-    st.title("EV Emissions and sales")
-    EV_em_and_sales.main(imported_data[table_names[4]])
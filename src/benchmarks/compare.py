@@ -0,0 +1,54 @@
+import argparse
+import json
+
+def load_results(path: str) -> dict[tuple[str, int], dict]:
+    """
+    Load the results of a benchmark run, keyed by case name and scale.
+
+    Parameters:
+    path (str): Path of the JSON result file.
+
+    Returns:
+    dict[tuple[str, int], dict]: Dictionary where keys are (name, scale) and values are the results.
+    """
+    with open(path, 'r') as f:
+        report = json.load(f)
+
+    return {(result['name'], result['scale']): result for result in report['results']}
+
+def compare(old_path: str, new_path: str) -> list[tuple]:
+    """
+    Compare two benchmark runs, e.g. of two commits.
+
+    Parameters:
+    old_path (str): Result file of the baseline run.
+    new_path (str): Result file of the new run.
+
+    Returns:
+    list[tuple]: Name, scale, old and new wall time (s) and the new/old ratios of wall time and peak memory
+    (None where a case is missing or failed in one of the runs).
+    """
+    old, new = load_results(old_path), load_results(new_path)
+
+    rows = []
+    for key in sorted(old.keys() | new.keys(), key=lambda key: (key[1], key[0])):
+        before, after = old.get(key, {}), new.get(key, {})
+        time_ratio = after['seconds'] / before['seconds'] if 'seconds' in before and 'seconds' in after else None
+        memory_ratio = after['peak_bytes'] / before['peak_bytes'] if before.get('peak_bytes') and 'peak_bytes' in after else None
+        rows.append((key[0], key[1], before.get('seconds'), after.get('seconds'), time_ratio, memory_ratio))
+
+    return rows
+
+def _format(value, spec: str) -> str:
+    return '-' if value is None else format(value, spec)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("old", help="result file of the baseline run")
+    parser.add_argument("new", help="result file of the new run")
+    args = parser.parse_args()
+
+    print(f"{'case':<58} {'scale':>5} {'old s':>9} {'new s':>9} {'time':>7} {'memory':>7}")
+    for name, scale, old_seconds, new_seconds, time_ratio, memory_ratio in compare(args.old, args.new):
+        print(f"{name:<58} {scale:>5} {_format(old_seconds, '9.4f')} {_format(new_seconds, '9.4f')} "
+              f"{_format(time_ratio, '6.2f')}x {_format(memory_ratio, '6.2f')}x")
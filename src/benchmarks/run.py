@@ -0,0 +1,316 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pandas as pd
+
+import benchmarks.synthetic as synthetic
+import data_utils.preprocess as preprocess
+import data_utils.scrape_data as scrape
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Page modules rendered headlessly, in the order of the sidebar
+PAGES = ['EV_Infrastructure', 'EVSales', 'emissions', 'EV_Prices_DE', 'EV_em_and_sales']
+
+@dataclass
+class Case:
+    """
+    A benchmarked call. setup builds fresh arguments (untimed) before every run of func.
+    """
+    name: str
+    params: dict
+    setup: Callable[[], tuple]
+    func: Callable
+    error: str = None
+    extra: dict = field(default_factory=dict)
+
+def measure(case: Case, repeats: int) -> dict:
+    """
+    Measure the wall time, peak memory and allocations of a benchmark case.
+
+    The wall time is the best of the timed runs; memory is measured in a separate run
+    under tracemalloc (which slows the code down).
+
+    Parameters:
+    case (Case): Case to run.
+    repeats (int): Number of timed runs.
+
+    Returns:
+    dict: Result with the best and all wall times (s), the peak traced memory (bytes),
+    the number of memory blocks allocated and still alive at the end of the call, or the error.
+    """
+    result = {'name': case.name, 'params': case.params, **case.extra}
+    if case.error:
+        return {**result, 'error': case.error}
+
+    try:
+        seconds = []
+        for _ in range(repeats):
+            args = case.setup()
+            gc.collect()
+            start = time.perf_counter()
+            case.func(*args)
+            seconds.append(time.perf_counter() - start)
+
+        args = case.setup()
+        gc.collect()
+        tracemalloc.start()
+        output = case.func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        tracemalloc.stop()
+        del output
+    except Exception as error:
+        tracemalloc.stop()
+        return {**result, 'error': f"{type(error).__name__}: {error}"}
+
+    return {**result, 'seconds': min(seconds), 'seconds_all': seconds, 'peak_bytes': peak, 'allocated_blocks': blocks}
+
+def _predict_all_countries(df: pd.DataFrame) -> None:
+    for country in df.index:
+        preprocess.predict_missing_values(df, country)
+
+def _stream_and_cube(src_path: str, dst_path: str) -> pd.DataFrame:
+    _, counts = preprocess.stream_emissions_data(src_path, dst_path)
+    return preprocess.emissions_cube(counts)
+
+def preprocess_cases(scale: int, workdir: str) -> list[Case]:
+    """
+    Get the benchmark cases of the ingest and preprocessing functions at a scale.
+
+    Parameters:
+    scale (int): Factor applied to the number of countries, years and vehicle rows.
+    workdir (str): Directory for generated files.
+
+    Returns:
+    list[Case]: Benchmark cases.
+    """
+    n_countries = synthetic.BASE_COUNTRIES * scale
+    n_years = synthetic.BASE_YEARS * scale
+    n_rows = synthetic.BASE_VEHICLE_ROWS * scale
+    n_models = synthetic.BASE_CAR_MODELS * scale
+    table = {'countries': n_countries, 'years': n_years}
+
+    jsonstat = synthetic.jsonstat(n_countries, n_years)
+    body = json.dumps(jsonstat)
+    sales = synthetic.sales(n_countries, n_years)
+    emissions = synthetic.emissions(n_countries, n_years)
+    new_evs = synthetic.new_evs(n_countries, n_years)
+    infrastructure = synthetic.infrastructure(n_countries)
+    vehicles = synthetic.vehicles(n_rows, n_countries, n_years)
+    ev_prices = synthetic.ev_prices(n_models)
+    prepared_prices = preprocess.preprocess_EV_prices(ev_prices)
+
+    vehicles_path = os.path.join(workdir, f'vehicles_{scale}.csv')
+    vehicles.to_csv(vehicles_path, index=False)
+    cleaned_path = os.path.join(workdir, f'vehicles_{scale}_cleaned.csv')
+
+    return [
+        Case('scrape_data.decode_jsonstat', table, lambda: (jsonstat,), scrape.decode_jsonstat),
+        Case('scrape_data.jsonstat_to_frame', {**table, 'bytes': len(body)}, lambda: (json.loads(body), 'geo', 'time'), scrape.jsonstat_to_frame),
+        Case('preprocess.preprocess_EV_sales', table, lambda: (sales,), preprocess.preprocess_EV_sales),
+        Case('preprocess.preprocess_EV_infrastructure', {'countries': n_countries}, lambda: (infrastructure,), preprocess.preprocess_EV_infrastructure),
+        Case('preprocess.preprocess_emissions_data', {'rows': n_rows}, lambda: (vehicles.copy(),), preprocess.preprocess_emissions_data),
+        Case('preprocess.stream_emissions_data+build_emissions_cube', {'rows': n_rows}, lambda: (vehicles_path, cleaned_path), _stream_and_cube),
+        Case('preprocess.preprocess_em_and_sales_data', table, lambda: (emissions, new_evs), preprocess.preprocess_em_and_sales_data),
+        Case('preprocess.predict_missing_values', table, lambda: (emissions,), _predict_all_countries),
+        Case('preprocess.impute_missing_values', table, lambda: (emissions,), preprocess.impute_missing_values),
+        Case('preprocess.preprocess_EV_prices', {'rows': n_models}, lambda: (ev_prices,), preprocess.preprocess_EV_prices),
+        Case('preprocess.summarize_EV_prices', {'rows': n_models}, lambda: (prepared_prices,), preprocess.summarize_EV_prices),
+    ]
+
+def db_cases(scale: int) -> list[Case]:
+    """
+    Get the benchmark case of the load_db write/read round trip, skipped without a database.
+
+    Parameters:
+    scale (int): Factor applied to the number of countries and years.
+
+    Returns:
+    list[Case]: Benchmark cases.
+    """
+    import load_db
+    import data_utils.db as db
+    from sqlalchemy import text
+
+    n_countries = synthetic.BASE_COUNTRIES * scale
+    n_years = synthetic.BASE_YEARS * scale
+    tables = {'Benchmark EV sales': preprocess.preprocess_EV_sales(synthetic.sales(n_countries, n_years))}
+
+    def round_trip(tables):
+        load_db.load_data_to_db(tables)
+        fetched = load_db.get_all_data([name.replace(" ", "") for name in tables])
+        with db.get_engine().begin() as connection:
+            for name in fetched:
+                connection.execute(text(f"DROP TABLE IF EXISTS {load_db.quote_identifier(name)}"))
+        return fetched
+
+    case = Case('load_db.round_trip', {'countries': n_countries, 'years': n_years}, lambda: (tables,), round_trip)
+    try:
+        with db.get_engine().connect():
+            pass
+    except Exception as error:
+        case.error = f"skipped, no database: {type(error).__name__}"
+
+    return [case]
+
+def publish_page_data(scale: int, workdir: str) -> None:
+    """
+    Publish synthetic tables at a scale as the data read by the pages.
+
+    Parameters:
+    scale (int): Factor applied to the number of countries, years and vehicle rows.
+    workdir (str): Directory for the snapshot and the file-backed tables.
+    """
+    import data_utils.data_access as data_access
+    import data_utils.snapshot as snapshot
+
+    n_countries = synthetic.BASE_COUNTRIES * scale
+    n_years = synthetic.BASE_YEARS * scale
+
+    vehicles_path = os.path.join(workdir, f'pages_vehicles_{scale}.csv')
+    synthetic.vehicles(synthetic.BASE_VEHICLE_ROWS * scale, n_countries, n_years).to_csv(vehicles_path, index=False)
+    infrastructure = preprocess.preprocess_EV_infrastructure(synthetic.infrastructure(n_countries))
+    ev_prices = preprocess.preprocess_EV_prices(synthetic.ev_prices(synthetic.BASE_CAR_MODELS * scale))
+
+    snapshot.SNAPSHOT_DIR = os.path.join(workdir, f'snapshot_{scale}')
+    snapshot.write_snapshot({
+        'EV sales': preprocess.preprocess_EV_sales(synthetic.sales(n_countries, n_years)),
+        'Fossil fuel emissions by cars': preprocess.build_emissions_cube(vehicles_path),
+        'EV infrastructure': infrastructure,
+        'EV prices': ev_prices,
+        'EV prices summary': preprocess.summarize_EV_prices(ev_prices),
+    })
+
+    data_access.NOC_CSV_PATH = os.path.join(workdir, f'noc_{scale}.csv')
+    infrastructure.to_csv(data_access.NOC_CSV_PATH, index=False)
+
+    em_and_sales_path = os.path.join(workdir, f'em_and_sales_{scale}.csv')
+    preprocess.preprocess_em_and_sales_data(synthetic.emissions(n_countries, n_years),
+                                            synthetic.new_evs(n_countries, n_years)).to_csv(em_and_sales_path)
+    data_access.CSV_TABLES = {**data_access.CSV_TABLES, 'EVEmissionsandsales': em_and_sales_path}
+
+def _quiet_streamlit_logs() -> None:
+    # Rendering outside a server session warns about the missing script run context
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith('streamlit'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+def _render_page(page: str, cold: bool) -> None:
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    import data_utils.chart_cache as chart_cache
+
+    _quiet_streamlit_logs()
+
+    if cold:
+        st.cache_resource.clear()
+        chart_cache._cache = chart_cache.ChartCache()
+
+    at = AppTest.from_string(f"import importlib\nimportlib.import_module('st_pages.{page}').main()", default_timeout=600).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+def page_cases(scale: int, workdir: str) -> list[Case]:
+    """
+    Get the benchmark cases rendering every page headlessly (Streamlit AppTest).
+
+    Every page is rendered cold (empty data and chart caches) and warm (rerun).
+
+    Parameters:
+    scale (int): Factor applied to the number of countries, years and vehicle rows.
+    workdir (str): Directory for the synthetic data.
+
+    Returns:
+    list[Case]: Benchmark cases.
+    """
+    publish_page_data(scale, workdir)
+    params = {'countries': synthetic.BASE_COUNTRIES * scale, 'years': synthetic.BASE_YEARS * scale}
+
+    cases = []
+    for page in PAGES:
+        for cold in (True, False):
+            name = f"st_pages.{page}.main[{'cold' if cold else 'warm'}]"
+            cases.append(Case(name, params, lambda page=page, cold=cold: (page, cold), _render_page))
+
+    return cases
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run(scales: list[int], repeats: int = 3, only: str = None, with_db: bool = True, with_pages: bool = True) -> dict:
+    """
+    Run the benchmark suite at several data scales.
+
+    Parameters:
+    scales (list[int]): Factors applied to the number of countries, years and vehicle rows (e.g. 1, 10, 100).
+    repeats (int): Number of timed runs per case.
+    only (str): Run only the cases whose name contains this text.
+    with_db (bool): Include the load_db round trip (needs a database at DSS_DATABASE_URL).
+    with_pages (bool): Include the headless page renders.
+
+    Returns:
+    dict: Run metadata (commit, platform, time) and the results of every case.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            cases = preprocess_cases(scale, workdir)
+            if with_db:
+                cases += db_cases(scale)
+            if with_pages:
+                cases += page_cases(scale, workdir)
+
+            for case in cases:
+                if only and only not in case.name:
+                    continue
+                case.extra['scale'] = scale
+                result = measure(case, repeats)
+                results.append(result)
+                status = result.get('error') or f"{result['seconds']:9.4f}s {result['peak_bytes'] / 2**20:9.1f} MiB"
+                print(f"x{scale:<4} {case.name:<58} {status}", flush=True)
+
+    return {
+        'commit': _git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'repeats': repeats,
+        'scales': scales,
+        'results': results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ingest, preprocessing and page rendering on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10], help="data scale factors (e.g. 1 10 100)")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--only", default=None, help="run only the cases whose name contains this text")
+    parser.add_argument("--no-db", action="store_true", help="skip the load_db round trip")
+    parser.add_argument("--no-pages", action="store_true", help="skip the headless page renders")
+    parser.add_argument("--out", default=None, help="result file, defaults to benchmarks/results/<time>-<commit>.json")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.repeats, args.only, with_db=not args.no_db, with_pages=not args.no_pages)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%dT%H%M%S')}-{report['commit'][:12]}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}", file=sys.stderr)
@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+
+# Size of the real data at scale 1; every generator multiplies its counts by the scale
+BASE_COUNTRIES = 40
+BASE_YEARS = 12
+BASE_VEHICLE_ROWS = 100_000
+BASE_CAR_MODELS = 360
+
+LAST_YEAR = 2023
+
+# Countries the pages select by default must exist in the synthetic tables
+EU_LABEL = "European Union - 27 countries (from 2020)"
+
+def countries(n: int) -> list[str]:
+    """
+    Get synthetic country names.
+
+    Parameters:
+    n (int): Number of countries.
+
+    Returns:
+    list[str]: 'Austria' and 'Belgium' (used as page defaults) followed by numbered names.
+    """
+    names = ['Austria', 'Belgium']
+    return (names + [f"Country {i:05d}" for i in range(n - len(names))])[:n]
+
+def years(n: int) -> list[int]:
+    """
+    Get the n most recent years, ending with LAST_YEAR.
+
+    Parameters:
+    n (int): Number of years.
+
+    Returns:
+    list[int]: Years in ascending order.
+    """
+    return list(range(LAST_YEAR - n + 1, LAST_YEAR + 1))
+
+def jsonstat(n_countries: int, n_years: int, missing: float = 0.1, seed: int = 0) -> dict:
+    """
+    Generate a Eurostat JSON-stat 2.0 dataset of yearly values per country.
+
+    Parameters:
+    n_countries (int): Number of geo categories.
+    n_years (int): Number of time categories.
+    missing (float): Share of cells left out of the sparse 'value' object.
+    seed (int): Random seed.
+
+    Returns:
+    dict: Parsed JSON-stat response with the dimensions freq, unit, geo and time.
+    """
+    rng = np.random.default_rng(seed)
+    geo = [f"G{i:05d}" for i in range(n_countries)]
+    time = [str(year) for year in years(n_years)]
+
+    size = n_countries * n_years
+    positions = np.flatnonzero(rng.random(size) >= missing)
+    values = rng.integers(0, 500_000, len(positions))
+
+    def dimension(codes, labels):
+        return {'category': {'index': {code: i for i, code in enumerate(codes)}, 'label': dict(zip(codes, labels))}}
+
+    return {
+        'version': '2.0',
+        'class': 'dataset',
+        'id': ['freq', 'unit', 'geo', 'time'],
+        'size': [1, 1, n_countries, n_years],
+        'value': {str(position): int(value) for position, value in zip(positions, values)},
+        'dimension': {
+            'freq': dimension(['A'], ['Annual']),
+            'unit': dimension(['NR'], ['Number']),
+            'geo': dimension(geo, [EU_LABEL] + countries(n_countries - 1)),
+            'time': dimension(time, time),
+        },
+    }
+
+def sales(n_countries: int, n_years: int, missing: float = 0.1, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a raw (country x year) EV sales table, as scraped.
+
+    Parameters:
+    n_countries (int): Number of countries.
+    n_years (int): Number of years.
+    missing (float): Share of missing cells.
+    seed (int): Random seed.
+
+    Returns:
+    pd.DataFrame: Float table with countries as index and years (str) as columns.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 500_000, (n_countries, n_years)).astype(float)
+    values[rng.random(values.shape) < missing] = np.nan
+
+    return pd.DataFrame(values, index=[EU_LABEL] + countries(n_countries - 1), columns=[str(year) for year in years(n_years)])
+
+def emissions(n_countries: int, n_years: int, missing: float = 0.2, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a (country x year) table of average CO2 emissions with gaps to impute.
+
+    Parameters:
+    n_countries (int): Number of countries.
+    n_years (int): Number of years.
+    missing (float): Share of missing cells.
+    seed (int): Random seed.
+
+    Returns:
+    pd.DataFrame: Float table with countries as index and years (int) as columns.
+    """
+    rng = np.random.default_rng(seed)
+    trend = 160 - 2.5 * np.arange(n_years)
+    values = trend + rng.normal(0, 5, (n_countries, n_years))
+    values[rng.random(values.shape) < missing] = np.nan
+
+    return pd.DataFrame(values, index=countries(n_countries), columns=years(n_years))
+
+def new_evs(n_countries: int, n_years: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate the number of new EVs per country and year, formatted like cleaned_NoEVS_data.csv.
+
+    Parameters:
+    n_countries (int): Number of countries.
+    n_years (int): Number of years.
+    seed (int): Random seed.
+
+    Returns:
+    pd.DataFrame: Table with a Country column and one column per year (str) holding '.'-separated thousands.
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.integers(100, 2_000_000, (n_countries, n_years))
+    formatted = np.vectorize(lambda value: f"{value:,}".replace(',', '.'))(values)
+
+    df = pd.DataFrame(formatted, columns=[str(year) for year in years(n_years)])
+    df.insert(0, 'Country', countries(n_countries))
+
+    return df
+
+def infrastructure(n_countries: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate raw charging infrastructure data, formatted like scraped_NoC_data.csv (read with header=1).
+
+    Parameters:
+    n_countries (int): Number of countries.
+    seed (int): Random seed.
+
+    Returns:
+    pd.DataFrame: Table with decimal commas in the ratio columns.
+    """
+    rng = np.random.default_rng(seed)
+    points = rng.integers(100, 100_000, n_countries)
+    fleet = rng.integers(1_000, 1_000_000, n_countries)
+    output = points * rng.integers(10, 60, n_countries)
+
+    def decimal_comma(values):
+        return [f"{value:.2f}".replace('.', ',') for value in values]
+
+    return pd.DataFrame({
+        'Country': countries(n_countries),
+        'Recharging Power / Recharging Point': decimal_comma(output / points),
+        'Recharging Power / Total Light Duty PEV fleet': decimal_comma(output / fleet),
+        'Total Recharging Power Output (kW)': output,
+        'Recharging Points': points,
+        'Light Duty PEV Fleet': fleet,
+    })
+
+def vehicles(n_rows: int, n_countries: int, n_years: int, missing: float = 0.01, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate per-vehicle energy consumption rows, formatted like the raw emissions CSV.
+
+    Parameters:
+    n_rows (int): Number of vehicles.
+    n_countries (int): Number of country codes.
+    n_years (int): Number of years.
+    missing (float): Share of rows without a consumption value.
+    seed (int): Random seed.
+
+    Returns:
+    pd.DataFrame: Table with the columns ID, Country, z (Wh/km) and year.
+    """
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"C{i:04d}" for i in range(n_countries)])
+    z = rng.normal(170, 40, n_rows).round()
+    z[rng.random(n_rows) < missing] = np.nan
+
+    return pd.DataFrame({
+        'ID': np.arange(1, n_rows + 1),
+        'Country': codes[rng.integers(0, n_countries, n_rows)],
+        'z (Wh/km)': z,
+        'year': rng.choice(years(n_years), n_rows),
+    })
+
+def ev_prices(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate EV model data, formatted like EV_cars.csv.
+
+    Parameters:
+    n_rows (int): Number of car models.
+    seed (int): Random seed.
+
+    Returns:
+    pd.DataFrame: Table with the columns of EV_cars.csv.
+    """
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({
+        'Battery': rng.uniform(20, 120, n_rows).round(1),
+        'Car_name': [f"Model {i}" for i in range(n_rows)],
+        'Car_name_link': [f"https://example.org/car/{i}" for i in range(n_rows)],
+        'Efficiency': rng.integers(130, 280, n_rows),
+        'Fast_charge': rng.integers(150, 1000, n_rows),
+        'Price.DE.': rng.integers(20_000, 190_000, n_rows),
+        'Range': rng.integers(150, 700, n_rows),
+        'Top_speed': rng.integers(120, 260, n_rows),
+        'acceleration..0.100.': rng.uniform(2.5, 14, n_rows).round(1),
+    })
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import streamlit as st
+
+import data_utils.tracing as tracing
+
+# Total size (bytes of serialized JSON) of the chart specs kept per process
+MAX_BYTES = int(os.environ.get('DSS_CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+class ChartCache:
+    """
+    Process-wide LRU cache of serialized chart specs with a byte budget.
+
+    Specs are shared by all sessions and must not be mutated by the caller.
+    """
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: tuple, build: Callable[[], tuple[object, int]]) -> object:
+        """
+        Get a cached spec, building and storing it on a miss.
+
+        Parameters:
+        key (tuple): Cache key (see make_key).
+        build (Callable): Function returning the spec and its size in bytes.
+
+        Returns:
+        object: The cached or newly built spec.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        with tracing.span(f"build:{key[0]}.{key[1]}", 'build'):
+            spec, size = build()
+
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (spec, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+
+        return spec
+
+    def stats(self) -> dict:
+        """
+        Get the hit/miss counters and current size of the cache.
+
+        Returns:
+        dict: Hits, misses, number of entries and bytes used.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self._bytes}
+
+_cache = ChartCache()
+
+def _normalize(value):
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    return value
+
+def make_key(page: str, chart: str, data_version: str, **widgets) -> tuple:
+    """
+    Build the cache key of a chart from its page, data version and widget state.
+
+    Lists become tuples and sets are sorted; pass sorted lists for widgets whose
+    order does not change the chart (e.g. a multiselect of countries).
+
+    Parameters:
+    page (str): Name of the page.
+    chart (str): Name of the chart on the page.
+    data_version (str): Version of the data the chart is built from.
+    **widgets: Widget values the chart depends on.
+
+    Returns:
+    tuple: Hashable cache key.
+    """
+    return (page, chart, data_version, tuple(sorted((name, _normalize(value)) for name, value in widgets.items())))
+
+def stats() -> dict:
+    """
+    Get the statistics of the process-wide chart cache.
+
+    Returns:
+    dict: Hits, misses, number of entries and bytes used.
+    """
+    return _cache.stats()
+
+def altair_chart(cache_key: tuple, build_chart: Callable, **kwargs) -> None:
+    """
+    Display an Altair chart, building and serializing it only on a cache miss.
+
+    Parameters:
+    cache_key (tuple): Cache key (see make_key).
+    build_chart (Callable): Function returning the Altair chart.
+    **kwargs: Passed on to st.vega_lite_chart.
+    """
+    def build():
+        spec = build_chart().to_dict()
+        return spec, len(json.dumps(spec, default=str))
+
+    spec = _cache.get_or_build(cache_key, build)
+    with tracing.span(f"emit:{cache_key[0]}.{cache_key[1]}", 'emit'):
+        st.vega_lite_chart(spec, **kwargs)
+
+def plotly_chart(cache_key: tuple, build_figure: Callable, **kwargs) -> None:
+    """
+    Display a plotly figure, building and serializing it only on a cache miss.
+
+    On a miss the figure is serialized once and rebuilt from its JSON spec; the cached
+    copy holds plain lists instead of NumPy arrays, which halves the cost of the
+    serialization st.plotly_chart does on every view.
+
+    Parameters:
+    cache_key (tuple): Cache key (see make_key).
+    build_figure (Callable): Function returning the plotly figure.
+    **kwargs: Passed on to st.plotly_chart.
+    """
+    def build():
+        import plotly.graph_objects as go
+
+        spec = build_figure().to_json()
+        return go.Figure(json.loads(spec), skip_invalid=True), len(spec)
+
+    fig = _cache.get_or_build(cache_key, build)
+    with tracing.span(f"emit:{cache_key[0]}.{cache_key[1]}", 'emit'):
+        st.plotly_chart(fig, **kwargs)
+
+def echarts_chart(cache_key: tuple, build_chart: Callable, **kwargs) -> None:
+    """
+    Display a pyecharts chart, building and serializing its options only on a cache miss.
+
+    Parameters:
+    cache_key (tuple): Cache key (see make_key).
+    build_chart (Callable): Function returning the pyecharts chart.
+    **kwargs: Passed on to st_echarts (e.g. the widget key).
+    """
+    from streamlit_echarts import st_echarts
+
+    def build():
+        options = build_chart().dump_options()
+        return json.loads(options), len(options)
+
+    spec = _cache.get_or_build(cache_key, build)
+    with tracing.span(f"emit:{cache_key[0]}.{cache_key[1]}", 'emit'):
+        st_echarts(options=spec, **kwargs)
@@ -0,0 +1,236 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+import data_utils.snapshot as snapshot
+import data_utils.tracing as tracing
+from data_utils.schema import enforce_schema
+
+# Where tables are read from: the published 'snapshot' or live from 'postgres'
+DATA_SOURCE = os.environ.get('DSS_DATA_SOURCE', 'snapshot')
+
+# How snapshot tables are held: 'copy' decodes the Parquet files into every process, 'mmap'
+# maps the Arrow files read-only so that all Streamlit processes of a node share one copy
+DATA_PLANE = os.environ.get('DSS_DATA_PLANE', 'copy')
+
+# Seconds a table read live from Postgres is reused before it is queried again
+DB_CACHE_TTL = int(os.environ.get('DSS_DB_CACHE_TTL', 60))
+
+# Tables served from local files instead of the snapshot (see readme)
+CSV_TABLES = {
+    "EVEmissionsandsales": "data/EV_em_and_sales.csv",
+}
+
+NOC_CSV_PATH = "data/cleaned_NoC_data.csv"
+GEODATA_PATH = "data/geodata/europe.geojson"
+
+# Upper bound of cached objects per loader; old versions are evicted after an update
+MAX_CACHED_ENTRIES = 32
+
+# Objects returned by this module are shared by all sessions of the process and must be
+# treated as read-only by the pages (copy before mutating).
+
+def file_version(path: str) -> int:
+    """
+    Get the version of a source file, used to invalidate cached objects.
+
+    Parameters:
+    path (str): Path of the file.
+
+    Returns:
+    int: Modification time of the file in nanoseconds.
+    """
+    return os.stat(path).st_mtime_ns
+
+# Upper bound of cached query results (one per table version, columns and filters)
+MAX_CACHED_QUERIES = 256
+
+# Lookups of the public getters and loads behind them (cache misses), see cache_stats
+_cache_counts = {'lookups': 0, 'misses': 0}
+_cache_counts_lock = threading.Lock()
+
+def _count(counter: str) -> None:
+    with _cache_counts_lock:
+        _cache_counts[counter] += 1
+
+def cache_stats() -> dict:
+    """
+    Get the hit/miss counters of the table caches of this process.
+
+    Returns:
+    dict: Hits and misses of get_table, get_csv and get_choropleth_data.
+    """
+    with _cache_counts_lock:
+        return {'hits': _cache_counts['lookups'] - _cache_counts['misses'], 'misses': _cache_counts['misses']}
+
+def _as_where(where: tuple) -> dict:
+    return {column: list(condition) if isinstance(condition, tuple) else condition for column, condition in where or ()}
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_QUERIES)
+def _load_snapshot_table(table_name: str, version: str, columns: tuple = None, where: tuple = None) -> pd.DataFrame:
+    _count('misses')
+    read = snapshot.map_table if DATA_PLANE == 'mmap' else snapshot.read_table
+    return read(table_name, columns=columns and list(columns), version=version, where=_as_where(where))
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_QUERIES, ttl=DB_CACHE_TTL)
+def _load_db_table(table_name: str, columns: tuple = None, where: tuple = None) -> pd.DataFrame:
+    _count('misses')
+    import data_utils.db as db
+
+    df = db.read_table(table_name, columns=columns and list(columns), where=_as_where(where))
+    return enforce_schema(df, table_name)
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_ENTRIES)
+def _load_csv(path: str, version: int) -> pd.DataFrame:
+    _count('misses')
+    return pd.read_csv(path)
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_ENTRIES)
+def _load_csv_table(table_name: str, version: int) -> pd.DataFrame:
+    _count('misses')
+    return enforce_schema(pd.read_csv(CSV_TABLES[table_name]), table_name)
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_QUERIES)
+def _query_csv_table(table_name: str, version: int, columns: tuple = None, where: tuple = None) -> pd.DataFrame:
+    # CSV files cannot be read selectively, the query runs on the cached table
+    # (a nested lookup, counted like the ones of the public getters)
+    _count('misses')
+    _count('lookups')
+    df = _load_csv_table(table_name, version)
+
+    mask = pd.Series(True, index=df.index)
+    for column, condition in _as_where(where).items():
+        values = df.index.to_series() if column == 'index' else df[column]
+        if isinstance(condition, range) and condition.step == 1:
+            mask &= (values >= condition.start) & (values < condition.stop)
+        elif isinstance(condition, (list, range)):
+            mask &= values.isin(list(condition))
+        else:
+            mask &= values == condition
+
+    return df.loc[mask.to_numpy(), list(columns) if columns is not None else df.columns]
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_ENTRIES)
+def _load_choropleth(detail: str, noc_path: str, noc_version: int, geo_version: int) -> tuple[pd.DataFrame, dict]:
+    _count('misses')
+    import data_utils.geometry as geometry
+
+    geo_df = geometry.load_simplified(detail)
+    _count('lookups')
+    noc_df = _load_csv(noc_path, noc_version)
+
+    merged = geo_df.set_index('NAME').join(noc_df.set_index('Country'), how='inner').dropna()
+
+    return pd.DataFrame(merged.drop(columns='geometry')), geometry.to_geojson(merged)
+
+def data_version(table_name: str) -> str:
+    """
+    Get the current version of a table, used to invalidate cached objects.
+
+    Parameters:
+    table_name (str): Name of the table.
+
+    Returns:
+    str: Snapshot version for snapshot tables, modification time for file-backed tables.
+    """
+    if table_name in CSV_TABLES:
+        return str(file_version(CSV_TABLES[table_name]))
+    if DATA_SOURCE == 'postgres':
+        # Live tables change without notice; versions follow the read cache's TTL
+        return f"postgres-{int(time.time() // DB_CACHE_TTL)}"
+    return snapshot.current_version()
+
+def data_available() -> bool:
+    """
+    Check whether the tables can be served, i.e. a snapshot has been published.
+
+    Returns:
+    bool: True once the refresh worker published the first snapshot (always True for Postgres).
+    """
+    return DATA_SOURCE == 'postgres' or snapshot.current_version() is not None
+
+def _hashable_where(where: dict) -> tuple:
+    if not where:
+        return None
+
+    items = []
+    for column, condition in sorted(where.items()):
+        if isinstance(condition, (set, frozenset)):
+            condition = tuple(sorted(condition))
+        elif isinstance(condition, list):
+            condition = tuple(condition)
+        items.append((column, condition))
+
+    return tuple(items)
+
+def get_table(table_name: str, columns: list[str] = None, where: dict = None) -> pd.DataFrame:
+    """
+    Get a preprocessed table, or the rows and columns of it selected by a query.
+
+    Columns and filters are pushed down to the storage: the snapshot reads only the
+    selected columns and skips Parquet row groups that cannot match, Postgres receives
+    them as SELECT columns and WHERE clauses. Results are cached once per process and
+    data version. With DSS_DATA_SOURCE=postgres the table is queried live from the
+    database and results are reused for DB_CACHE_TTL seconds.
+
+    Parameters:
+    table_name (str): Name of the table (as used in the snapshot).
+    columns (list[str]): Columns to return, defaults to all of them. The index is always returned.
+    where (dict): Row filters by column ('index' for an unnamed index): a list of values, a range (e.g. range(2017, 2024)) or a single value.
+
+    Returns:
+    pd.DataFrame: Shared, read-only DataFrame containing the selected rows and columns.
+    """
+    columns = tuple(columns) if columns is not None else None
+    where = _hashable_where(where)
+    _count('lookups')
+
+    with tracing.span(f"load:{table_name}", 'load', source=DATA_SOURCE) as span:
+        if table_name in CSV_TABLES:
+            version = file_version(CSV_TABLES[table_name])
+            if columns is None and where is None:
+                df = _load_csv_table(table_name, version)
+            else:
+                df = _query_csv_table(table_name, version, columns, where)
+        elif DATA_SOURCE == 'postgres':
+            df = _load_db_table(snapshot.clean_table_name(table_name), columns, where)
+        else:
+            df = _load_snapshot_table(snapshot.clean_table_name(table_name), data_version(table_name), columns, where)
+        span.set('rows', len(df))
+
+    return df
+
+def get_csv(path: str) -> pd.DataFrame:
+    """
+    Get the contents of a CSV file, re-read only when the file changes.
+
+    Parameters:
+    path (str): Path of the CSV file.
+
+    Returns:
+    pd.DataFrame: Shared, read-only DataFrame containing the file.
+    """
+    _count('lookups')
+    with tracing.span(f"load:{os.path.basename(path)}", 'load'):
+        return _load_csv(path, file_version(path))
+
+def get_choropleth_data(detail: str, noc_path: str = None) -> tuple[pd.DataFrame, dict]:
+    """
+    Get the charging infrastructure per country joined to simplified country geometries.
+
+    The join and GeoJSON conversion run once per detail level and data version.
+
+    Parameters:
+    detail (str): Map detail level, one of geometry.DETAIL_LEVELS.
+    noc_path (str): Path of the cleaned charging infrastructure CSV file, defaults to NOC_CSV_PATH.
+
+    Returns:
+    tuple: Shared, read-only DataFrame indexed by country name and the matching GeoJSON FeatureCollection.
+    """
+    noc_path = noc_path or NOC_CSV_PATH
+    _count('lookups')
+    with tracing.span(f"load:choropleth-{detail}", 'load'):
+        return _load_choropleth(detail, noc_path, file_version(noc_path), file_version(GEODATA_PATH))
@@ -0,0 +1,167 @@
+import pandas as pd
+from sqlalchemy import text
+
+# Normalized long-format tables loaded next to the dashboard tables: one row per country
+# (and year), typed columns and a primary key that also serves (country, year) lookups.
+# Their rows are upserted on every load, so the views depending on them are never dropped.
+TABLES = {
+    "ev_sales": {
+        'source': 'EV sales',
+        'columns': {'country': 'text', 'year': 'smallint', 'new_cars': 'integer NOT NULL'},
+        'primary_key': ['country', 'year'],
+        'indexes': [['year']],
+    },
+    "ev_emissions": {
+        'source': 'Fossil fuel emissions by cars',
+        'columns': {
+            'country': 'text', 'year': 'smallint', 'z_sum': 'real', 'z_count': 'integer',
+            'z_mean': 'real', 'z_p25': 'real', 'z_median': 'real', 'z_p75': 'real',
+        },
+        'primary_key': ['country', 'year'],
+        'indexes': [['year']],
+    },
+    "ev_charging": {
+        'source': 'EV infrastructure',
+        'columns': {
+            'country': 'text', 'power_per_point_kw': 'real', 'power_per_fleet_ev_kw': 'real',
+            'total_power_kw': 'integer', 'charging_points': 'integer', 'ev_fleet': 'integer',
+        },
+        'primary_key': ['country'],
+        'indexes': [],
+    },
+}
+
+# Materialized views of the aggregates shown by the pages, with the columns of their
+# unique index (required to refresh them concurrently)
+VIEWS = {
+    "mv_sales_per_country_year": {
+        'query': """
+            SELECT country, year, new_cars,
+                   new_cars - lag(new_cars) OVER (PARTITION BY country ORDER BY year) AS change
+            FROM ev_sales
+        """,
+        'unique': ['country', 'year'],
+    },
+    "mv_emissions_per_country_year": {
+        'query': """
+            SELECT country, year, z_count AS vehicles,
+                   z_sum / NULLIF(z_count, 0) AS avg_wh_per_km, z_median AS median_wh_per_km
+            FROM ev_emissions
+        """,
+        'unique': ['country', 'year'],
+    },
+    "mv_charging_stats": {
+        'query': """
+            SELECT country, charging_points, total_power_kw, ev_fleet, power_per_point_kw,
+                   ev_fleet::double precision / NULLIF(charging_points, 0) AS evs_per_point,
+                   rank() OVER (ORDER BY charging_points DESC NULLS LAST) AS points_rank
+            FROM ev_charging
+        """,
+        'unique': ['country'],
+    },
+}
+
+def _sales(df: pd.DataFrame) -> pd.DataFrame:
+    long = df.rename_axis('country').reset_index().melt(id_vars='country', var_name='year', value_name='new_cars')
+    return long.astype({'year': int})
+
+def _emissions(df: pd.DataFrame) -> pd.DataFrame:
+    return df.rename(columns={'Country': 'country'})
+
+def _charging(df: pd.DataFrame) -> pd.DataFrame:
+    return df.rename(columns={
+        'Country': 'country',
+        'Power per station (kW)': 'power_per_point_kw',
+        'Power available per fleet': 'power_per_fleet_ev_kw',
+        'Total Recharging Power Output (kW)': 'total_power_kw',
+        'Recharging Points': 'charging_points',
+        'Light Duty PEV Fleet': 'ev_fleet',
+    })
+
+def _required_columns(table: dict) -> list[str]:
+    return [column for column, sql_type in table['columns'].items()
+            if column in table['primary_key'] or 'NOT NULL' in sql_type]
+
+# Functions turning a dashboard table into the rows of its normalized table
+NORMALIZERS = {
+    "ev_sales": _sales,
+    "ev_emissions": _emissions,
+    "ev_charging": _charging,
+}
+
+def normalize(tables: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """
+    Convert dashboard tables into the rows of the normalized tables.
+
+    Rows missing a key or a NOT NULL value (e.g. a country without a name) are dropped.
+    A given source table that is empty yields no rows, so its normalized table is emptied.
+
+    Parameters:
+    tables (dict[str, pd.DataFrame]): Dictionary where keys are table names (as in the preparation, e.g. 'EV sales') and values are DataFrames.
+
+    Returns:
+    dict[str, pd.DataFrame]: Rows of the normalized tables whose source table was given, with the columns of TABLES.
+    """
+    normalized = {}
+    for table_name, table in TABLES.items():
+        df = tables.get(table['source'])
+        if df is not None:
+            rows = NORMALIZERS[table_name](df)[list(table['columns'])]
+            # Drop before converting, astype(str) would turn a missing country into 'nan'
+            rows = rows.dropna(subset=_required_columns(table))
+            normalized[table_name] = rows.astype({'country': str})
+
+    return normalized
+
+def _table_columns(connection, table_name: str) -> dict[str, str]:
+    result = connection.execute(text(
+        "SELECT a.attname, format_type(a.atttypid, a.atttypmod) FROM pg_attribute a "
+        "JOIN pg_class t ON t.oid = a.attrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "WHERE n.nspname = current_schema() AND t.relname = :table_name AND t.relkind = 'r' "
+        "AND a.attnum > 0 AND NOT a.attisdropped ORDER BY a.attnum"
+    ), {"table_name": table_name})
+
+    return dict(result.all())
+
+def create_schema(connection) -> None:
+    """
+    Create the normalized tables, their indexes and the materialized views if they do not exist.
+
+    A table whose columns or column types differ from TABLES (created by an older version)
+    is dropped together with the views depending on it and created again; its rows are
+    derived from the dashboard tables, so the load that follows fills it in.
+
+    Parameters:
+    connection: SQLAlchemy connection with an open transaction.
+    """
+    for table_name, table in TABLES.items():
+        expected = {column: sql_type.split()[0] for column, sql_type in table['columns'].items()}
+        existing = _table_columns(connection, table_name)
+        if existing and existing != expected:
+            connection.execute(text(f"DROP TABLE {table_name} CASCADE"))
+
+        columns = ", ".join(f"{column} {sql_type}" for column, sql_type in table['columns'].items())
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table_name} ({columns}, PRIMARY KEY ({', '.join(table['primary_key'])}))"
+        ))
+        for index in table['indexes']:
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {table_name}_{'_'.join(index)} ON {table_name} ({', '.join(index)})"
+            ))
+
+    for view_name, view in VIEWS.items():
+        connection.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view_name} AS {view['query']}"))
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {view_name}_key ON {view_name} ({', '.join(view['unique'])})"
+        ))
+
+def refresh_views(connection) -> None:
+    """
+    Refresh all materialized views without blocking the queries reading them.
+
+    Parameters:
+    connection: SQLAlchemy connection with an open transaction.
+    """
+    for view_name in VIEWS:
+        connection.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view_name}"))
@@ -0,0 +1,92 @@
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from data_utils.http_cache import CachedResponse, cached_get
+
+# (connect, read) timeouts in seconds for a single request
+DEFAULT_TIMEOUT = (5, 60)
+
+# Retry transient failures (connection errors, throttling, 5xx) with exponential backoff
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Number of keep-alive connections kept open per host
+POOL_SIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+def create_session(pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES) -> requests.Session:
+    """
+    Create a requests session with a pooled, retrying HTTP adapter.
+
+    Parameters:
+    pool_size (int): Number of keep-alive connections kept per host.
+    max_retries (int): Maximum number of retries for a failed request.
+
+    Returns:
+    requests.Session: Configured session.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json', 'Accept-Encoding': 'gzip, deflate'})
+
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide session, creating it on first use.
+
+    Returns:
+    requests.Session: Shared session used by all scrapes.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+
+    return _session
+
+def fetch(url: str, timeout: tuple[float, float] = DEFAULT_TIMEOUT, session: requests.Session = None) -> CachedResponse:
+    """
+    Fetch a URL through the on-disk HTTP cache.
+
+    Parameters:
+    url (str): URL to fetch.
+    timeout (tuple[float, float]): Connect and read timeout in seconds.
+    session (requests.Session): Session to use, defaults to the shared session.
+
+    Returns:
+    CachedResponse: Response body and whether it came from the cache or the network.
+    """
+    return cached_get(url, session or get_session(), timeout)
+
+def fetch_json(url: str, timeout: tuple[float, float] = DEFAULT_TIMEOUT, session: requests.Session = None) -> dict:
+    """
+    Fetch a URL and parse the JSON response.
+
+    Parameters:
+    url (str): URL to fetch.
+    timeout (tuple[float, float]): Connect and read timeout in seconds.
+    session (requests.Session): Session to use, defaults to the shared session.
+
+    Returns:
+    dict: Parsed JSON body.
+    """
+    return json.loads(fetch(url, timeout, session).body)
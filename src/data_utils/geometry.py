@@ -0,0 +1,97 @@
+import json
+import os
+from typing import TYPE_CHECKING
+
+# geopandas and shapely are imported where they are used: the dashboard only needs them
+# to build or load the geometry cache, not to read the detail levels below
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+GEODATA_PATH = "data/geodata/europe.geojson"
+GEOMETRY_CACHE_DIR = "data/geodata/cache"
+
+# Simplification tolerance (degrees) per map detail level
+DETAIL_LEVELS = {'low': 0.1, 'medium': 0.03, 'high': 0.01}
+DEFAULT_DETAIL = 'medium'
+
+# Coordinates are snapped to this grid (degrees, roughly 10 m) to shorten the payload
+GRID_SIZE = 1e-4
+
+# Bump when the simplification changes, so caches built by older code are not served
+GEOMETRY_CACHE_VERSION = 2
+
+def simplified_path(tolerance: float) -> str:
+    """
+    Get the cache file of the geometries simplified with a tolerance.
+
+    Parameters:
+    tolerance (float): Simplification tolerance in degrees.
+
+    Returns:
+    str: Path of the GeoParquet cache file.
+    """
+    return os.path.join(GEOMETRY_CACHE_DIR, f"europe_v{GEOMETRY_CACHE_VERSION}_{tolerance:g}.parquet")
+
+def build_geometry_cache(path: str = GEODATA_PATH, tolerances: list[float] = DETAIL_LEVELS.values()) -> None:
+    """
+    Precompute simplified country geometries for every detail level.
+
+    The countries are simplified together as a coverage (shapely.coverage_simplify), so
+    a border shared by two neighbours is simplified once and both keep the same edge
+    instead of drifting into slivers and overlaps. The result is snapped to GRID_SIZE
+    and stored as compact GeoParquet.
+
+    Parameters:
+    path (str): Path of the full-resolution GeoJSON file.
+    tolerances (list[float]): Simplification tolerances in degrees.
+    """
+    import geopandas as gpd
+    import shapely
+
+    geo_df = gpd.read_file(path)[['NAME', 'geometry']]
+    os.makedirs(GEOMETRY_CACHE_DIR, exist_ok=True)
+
+    for tolerance in tolerances:
+        simplified = geo_df.copy()
+        simplified['geometry'] = shapely.set_precision(
+            shapely.coverage_simplify(geo_df.geometry.values, tolerance), GRID_SIZE)
+        simplified = simplified[~simplified.geometry.is_empty]
+
+        cache_path = simplified_path(tolerance)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        simplified.to_parquet(tmp_path)
+        os.replace(tmp_path, cache_path)
+
+def load_simplified(detail: str = DEFAULT_DETAIL, path: str = GEODATA_PATH) -> 'gpd.GeoDataFrame':
+    """
+    Load the simplified country geometries of a detail level, rebuilding the cache if it is stale.
+
+    Parameters:
+    detail (str): Detail level, one of DETAIL_LEVELS.
+    path (str): Path of the full-resolution GeoJSON file.
+
+    Returns:
+    gpd.GeoDataFrame: GeoDataFrame with the NAME and geometry of each country.
+    """
+    cache_path = simplified_path(DETAIL_LEVELS[detail])
+
+    if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(path):
+        build_geometry_cache(path)
+
+    import geopandas as gpd
+
+    return gpd.read_parquet(cache_path)
+
+def to_geojson(geo_df: 'gpd.GeoDataFrame') -> dict:
+    """
+    Convert geometries to a minimal GeoJSON FeatureCollection for plotly.
+
+    Only the geometry is kept; features are identified by the DataFrame index.
+
+    Parameters:
+    geo_df (gpd.GeoDataFrame): GeoDataFrame to convert.
+
+    Returns:
+    dict: GeoJSON FeatureCollection with one feature per row.
+    """
+    return json.loads(geo_df[['geometry']].to_json(drop_id=False))
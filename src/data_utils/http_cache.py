@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+# Directory holding cached response bodies, their metadata and derived artifacts
+CACHE_DIR = os.environ.get('DSS_HTTP_CACHE_DIR', 'data/http_cache')
+
+# Responses younger than this (seconds) are served without contacting the server
+MAX_AGE = int(os.environ.get('DSS_HTTP_CACHE_MAX_AGE', 24 * 3600))
+
+# Total cache size (bytes) above which the least recently used entries are evicted;
+# every hit counts as a use (it touches the entry's metadata file)
+MAX_BYTES = int(os.environ.get('DSS_HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Serve only from the cache and never touch the network
+OFFLINE = os.environ.get('DSS_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+# status is one of 'fresh' (served from cache within MAX_AGE), 'revalidated' (server
+# answered 304), 'stale' (server unreachable, cached copy served), 'offline' or 'downloaded'
+CachedResponse = namedtuple('CachedResponse', ['url', 'key', 'body', 'status'])
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so that equivalent requests share one cache entry.
+
+    Parameters:
+    url (str): URL to normalize.
+
+    Returns:
+    str: URL with lowercase scheme and host and sorted query parameters.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))
+
+def cache_key(url: str) -> str:
+    """
+    Get the cache key of a URL.
+
+    Parameters:
+    url (str): URL of the request.
+
+    Returns:
+    str: Hex digest of the normalized URL.
+    """
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+def artifact_path(key: str, suffix: str) -> str:
+    """
+    Get the path of a file belonging to a cache entry.
+
+    Derived artifacts (e.g. a decoded copy of the body) stored under this path are
+    evicted together with the entry.
+
+    Parameters:
+    key (str): Cache key of the entry.
+    suffix (str): File suffix, e.g. 'body' or 'decoded.npz'.
+
+    Returns:
+    str: Path of the file inside CACHE_DIR.
+    """
+    return os.path.join(CACHE_DIR, f"{key}.{suffix}")
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _read_entry(key: str) -> tuple[dict, bytes]:
+    try:
+        with open(artifact_path(key, 'json'), 'r') as f:
+            meta = json.load(f)
+        with open(artifact_path(key, 'body'), 'rb') as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None, None
+
+    return meta, body
+
+def _write_meta(key: str, meta: dict) -> None:
+    _atomic_write(artifact_path(key, 'json'), json.dumps(meta).encode())
+
+def _touch(key: str) -> None:
+    # The mtime of the metadata file is the entry's last use (see evict)
+    try:
+        os.utime(artifact_path(key, 'json'))
+    except OSError:
+        pass
+
+def cached_get(url: str, session: requests.Session, timeout: tuple[float, float], max_age: int = MAX_AGE, offline: bool = OFFLINE) -> CachedResponse:
+    """
+    GET a URL through the on-disk cache.
+
+    Entries younger than max_age are served directly. Older entries are revalidated
+    with If-None-Match / If-Modified-Since, so an unchanged dataset costs one 304
+    round trip and no body transfer.
+
+    Parameters:
+    url (str): URL to fetch.
+    session (requests.Session): Session used for network requests.
+    timeout (tuple[float, float]): Connect and read timeout in seconds.
+    max_age (int): Maximum age in seconds of an entry served without revalidation.
+    offline (bool): Serve only from the cache.
+
+    Returns:
+    CachedResponse: Response body together with how it was obtained.
+    """
+    key = cache_key(url)
+    meta, body = _read_entry(key)
+
+    if offline:
+        if meta is None:
+            raise FileNotFoundError(f"No cached response for {url} in offline mode")
+        _touch(key)
+        return CachedResponse(url, key, body, 'offline')
+
+    if meta is not None and time.time() - meta['fetched_at'] < max_age:
+        _touch(key)
+        return CachedResponse(url, key, body, 'fresh')
+
+    headers = {}
+    if meta is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+    except requests.RequestException:
+        if meta is None:
+            raise
+        _touch(key)
+        return CachedResponse(url, key, body, 'stale')
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    if response.status_code == 304 and meta is not None:
+        meta['fetched_at'] = time.time()
+        _write_meta(key, meta)
+        return CachedResponse(url, key, body, 'revalidated')
+
+    body = response.content
+    _atomic_write(artifact_path(key, 'body'), body)
+    _write_meta(key, {
+        'url': normalize_url(url),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fetched_at': time.time(),
+    })
+    evict(keep=key)
+
+    return CachedResponse(url, key, body, 'downloaded')
+
+def evict(max_bytes: int = None, keep: str = None) -> None:
+    """
+    Remove the least recently used entries until the cache fits in max_bytes.
+
+    An entry is used when it is downloaded, revalidated or served from the cache. Its
+    derived artifacts count towards its size and are removed with it. Files removed
+    concurrently (e.g. by another process evicting at the same time) are skipped.
+
+    Parameters:
+    max_bytes (int): Maximum total size of the cache directory in bytes, defaults to MAX_BYTES.
+    keep (str): Cache key of an entry that is never evicted, e.g. the one being written.
+    """
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    entries = {}
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.tmp'):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        key = name.split('.', 1)[0]
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entry = entries.setdefault(key, {'paths': [], 'size': 0, 'used_at': 0.0})
+        entry['paths'].append(path)
+        entry['size'] += stat.st_size
+        if name.endswith('.json'):
+            entry['used_at'] = stat.st_mtime
+
+    total = sum(entry['size'] for entry in entries.values())
+    for key, entry in sorted(entries.items(), key=lambda item: item[1]['used_at']):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        for path in entry['paths']:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        total -= entry['size']
@@ -0,0 +1,171 @@
+import hashlib
+import importlib
+import inspect
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pandas as pd
+
+# Directory holding the cached output of every stage, one Parquet file per stage and input hash
+STAGE_CACHE_DIR = os.environ.get('DSS_STAGE_CACHE_DIR', 'data/.stage_cache')
+
+# Bump to invalidate every cached stage output
+PIPELINE_VERSION = '9'
+
+@dataclass
+class Stage:
+    """
+    A step of the preprocessing pipeline producing one DataFrame.
+
+    func must be a module-level function (it runs in a worker process). It is called
+    with the outputs of the stages named in inputs, in that order. code lists the
+    modules (besides the one defining func) whose source invalidates the cached output.
+    """
+    name: str
+    func: Callable[..., pd.DataFrame]
+    inputs: list[str] = field(default_factory=list)
+    files: list[str] = field(default_factory=list)
+    code: list[str] = field(default_factory=list)
+    cacheable: bool = True
+
+@dataclass
+class StageResult:
+    name: str
+    output: pd.DataFrame
+    status: str
+    seconds: float
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def _hash_frame(df: pd.DataFrame) -> str:
+    digest = hashlib.sha256(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+def stage_key(stage: Stage, input_hashes: list[str]) -> str:
+    """
+    Get the cache key of a stage: a hash of its code, source files and upstream outputs.
+
+    The code version covers the whole module defining the stage function and the modules
+    listed in the stage's code, so changes to the helpers it calls invalidate the stage as well.
+
+    Parameters:
+    stage (Stage): Stage to hash.
+    input_hashes (list[str]): Content hashes of the outputs of the stage's inputs.
+
+    Returns:
+    str: Hex digest identifying the stage's output.
+    """
+    digest = hashlib.sha256(f"{PIPELINE_VERSION}:{stage.name}".encode())
+
+    sources = [inspect.getsourcefile(stage.func)]
+    sources += [inspect.getsourcefile(importlib.import_module(module)) for module in stage.code]
+    for path in sources:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    digest.update(stage.func.__qualname__.encode())
+
+    for path in stage.files:
+        digest.update(_hash_file(path).encode())
+    for input_hash in input_hashes:
+        digest.update(input_hash.encode())
+
+    return digest.hexdigest()
+
+def _cache_path(stage: Stage, key: str) -> str:
+    return os.path.join(STAGE_CACHE_DIR, f"{stage.name.replace(' ', '')}-{key[:16]}.parquet")
+
+def _remove_stale_outputs(stage: Stage, keep_path: str) -> None:
+    prefix = f"{stage.name.replace(' ', '')}-"
+    for file_name in os.listdir(STAGE_CACHE_DIR):
+        path = os.path.join(STAGE_CACHE_DIR, file_name)
+        if file_name.startswith(prefix) and file_name.endswith('.parquet') and path != keep_path:
+            os.remove(path)
+
+def _run_stage(func: Callable[..., pd.DataFrame], inputs: list[pd.DataFrame]) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    output = func(*inputs)
+
+    return output, time.perf_counter() - start
+
+def run_pipeline(stages: list[Stage], max_workers: int = None, force: bool = False) -> dict[str, StageResult]:
+    """
+    Run the stages of a pipeline, independent stages concurrently on a process pool.
+
+    A cacheable stage whose key (see stage_key) matches a cached output is not run.
+
+    Parameters:
+    stages (list[Stage]): Stages of the pipeline, in any order.
+    max_workers (int): Number of worker processes, defaults to the number of CPUs.
+    force (bool): Ignore the cache and run every stage.
+
+    Returns:
+    dict[str, StageResult]: Dictionary where keys are stage names and values are their output and status ('hit' or 'run').
+    """
+    by_name = {stage.name: stage for stage in stages}
+    results = {}
+    output_hashes = {}
+    keys = {}
+    pending = dict(by_name)
+    running = {}
+
+    os.makedirs(STAGE_CACHE_DIR, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            # Start (or serve from cache) every stage whose inputs are available,
+            # repeating while cache hits make further stages ready
+            ready = True
+            while ready:
+                ready = False
+                for name, stage in list(pending.items()):
+                    if any(input_name not in results for input_name in stage.inputs):
+                        continue
+                    del pending[name]
+                    ready = True
+
+                    if stage.cacheable:
+                        keys[name] = stage_key(stage, [output_hashes[input_name] for input_name in stage.inputs])
+                        cache_path = _cache_path(stage, keys[name])
+                        if not force and os.path.exists(cache_path):
+                            start = time.perf_counter()
+                            output = pd.read_parquet(cache_path)
+                            results[name] = StageResult(name, output, 'hit', time.perf_counter() - start)
+                            output_hashes[name] = keys[name]
+                            continue
+
+                    inputs = [results[input_name].output for input_name in stage.inputs]
+                    running[executor.submit(_run_stage, stage.func, inputs)] = stage
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Stages with missing or cyclic inputs: {sorted(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                output, seconds = future.result()
+                results[stage.name] = StageResult(stage.name, output, 'run', seconds)
+
+                if stage.cacheable:
+                    cache_path = _cache_path(stage, keys[stage.name])
+                    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                    output.to_parquet(tmp_path)
+                    os.replace(tmp_path, cache_path)
+                    _remove_stale_outputs(stage, cache_path)
+                    output_hashes[stage.name] = keys[stage.name]
+                else:
+                    output_hashes[stage.name] = _hash_frame(output)
+
+    return results
@@ -1,27 +1,298 @@
+import os
+
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+from data_utils.schema import PRICE_CATEGORIES, SCHEMAS, enforce_schema
+
+# Columns of the per-vehicle emissions CSV used by the dashboard, with their narrowest dtypes
+EMISSIONS_DTYPES = SCHEMAS['Vehicle emissions']['columns']
+
+# Number of rows of the emissions CSV held in memory at once when streaming
+EMISSIONS_CHUNK_ROWS = 500_000
+
+# Country codes used in the emissions data and their full names
+COUNTRY_NAMES = {
+    'AT': 'Austria', 'BE': 'Belgium', 'BG': 'Bulgaria', 'CY': 'Cyprus',
+    'CZ': 'Czech Republic', 'DE': 'Germany', 'DK': 'Denmark', 'EE': 'Estonia',
+    'ES': 'Spain', 'FI': 'Finland', 'FR': 'France', 'GR': 'Greece',
+    'HR': 'Croatia', 'HU': 'Hungary', 'IE': 'Ireland', 'IS': 'Iceland',
+    'IT': 'Italy', 'LT': 'Lithuania', 'LU': 'Luxembourg', 'LV': 'Latvia',
+    'MT': 'Malta', 'NL': 'Netherlands', 'NO': 'Norway', 'PL': 'Poland',
+    'PT': 'Portugal', 'RO': 'Romania', 'SE': 'Sweden', 'SI': 'Slovenia',
+    'SK': 'Slovakia'
+}
+
+# Columns of the (country x year) aggregate of the emissions data
+EMISSIONS_CUBE_COLUMNS = ['Country', 'year', 'z_sum', 'z_count', 'z_mean', 'z_p25', 'z_median', 'z_p75']
+
+# Price bins (EUR) of the EV prices data, labelled with PRICE_CATEGORIES
+PRICE_BINS = [0, 30000, 40000, 50000, 60000, 70000, 80000, 90000, 200000]
+
+# Attributes of the EV prices data summarized per price category (see summarize_EV_prices)
+PRICE_SUMMARY_ATTRIBUTES = ['Range', 'Efficiency', 'Fast_charge']
+
+# Outlier filtering of the emissions data: fences are computed per group of these columns,
+# groups with fewer rows than OUTLIER_MIN_GROUP_ROWS get the fences of all rows instead
+OUTLIER_GROUPS = ['Country', 'year']
+OUTLIER_METHOD = 'iqr'
+OUTLIER_MIN_GROUP_ROWS = 30
+
+def grouped_quantiles_from_counts(counts: pd.Series, q: list[float]) -> pd.DataFrame:
+    """
+    Compute exact quantiles of every group of a frequency table at once, using the same
+    linear interpolation as np.percentile.
+
+    Parameters:
+    counts (pd.Series): Number of occurrences indexed by (*group, value), e.g. from value_counts_by_group.
+    q (list[float]): Quantiles to compute, between 0 and 1.
+
+    Returns:
+    pd.DataFrame: Quantile values with one row per group and one column per quantile.
+    """
+    counts = counts.sort_index()
+    values = counts.index.get_level_values(-1).to_numpy(dtype=float)
+    cumulative = np.cumsum(counts.to_numpy(dtype=float))
 
-def get_outlier_indices_IQR_method(data: np.array) -> np.array:
+    # Sorted groups are contiguous: a quantile of a group is found in the cumulative
+    # counts of all groups by shifting its position by the rows of the previous groups
+    codes, groups = pd.factorize(counts.index.droplevel(-1))
+    totals = np.bincount(codes, weights=counts.to_numpy(dtype=float))
+    offsets = np.cumsum(totals) - totals
+
+    positions = np.asarray(q, dtype=float)[None, :] * (totals - 1)[:, None]
+    lower = np.floor(positions)
+    fraction = positions - lower
+    upper = np.minimum(lower + 1, (totals - 1)[:, None])
+
+    lower_values = values[np.searchsorted(cumulative, offsets[:, None] + lower, side='right')]
+    upper_values = values[np.searchsorted(cumulative, offsets[:, None] + upper, side='right')]
+
+    return pd.DataFrame(lower_values + (upper_values - lower_values) * fraction, index=groups, columns=list(q))
+
+def value_counts_by_group(df: pd.DataFrame, column: str, by: list[str]) -> pd.Series:
     """
-    Identify outliers in the data using the Interquartile Range (IQR) method.
+    Count the occurrences of every value of a column per group; missing values are not counted.
 
     Parameters:
-    data (np.array): Array of numerical data.
+    df (pd.DataFrame): DataFrame containing the data.
+    column (str): Column whose values are counted.
+    by (list[str]): Columns defining the groups, an empty list puts all rows in one group.
 
     Returns:
-    np.array: Indices of outliers in the data.
+    pd.Series: Number of occurrences indexed by (*group, value).
+    """
+    keys = [df[name] for name in by] or [pd.Series(np.zeros(len(df), dtype=np.int8), index=df.index)]
+    return df[column].groupby(keys + [df[column]], observed=True).size()
+
+def _group_levels(counts: pd.Series) -> list[int]:
+    return list(range(counts.index.nlevels - 1))
+
+def _iqr_fences(counts: pd.Series, k: float) -> pd.DataFrame:
+    quartiles = grouped_quantiles_from_counts(counts, [0.25, 0.75])
+    iqr = quartiles[0.75] - quartiles[0.25]
+    return pd.DataFrame({'lower': quartiles[0.25] - k * iqr, 'upper': quartiles[0.75] + k * iqr})
+
+def _mad_fences(counts: pd.Series, k: float) -> pd.DataFrame:
+    # Median absolute deviation, scaled to estimate the standard deviation of normal data
+    median = grouped_quantiles_from_counts(counts, [0.5])[0.5]
+    groups = counts.index.droplevel(-1)
+    deviations = np.abs(counts.index.get_level_values(-1).to_numpy(dtype=float) - median.reindex(groups).to_numpy())
+
+    levels = [groups.get_level_values(level) for level in range(groups.nlevels)]
+    deviation_counts = pd.Series(counts.to_numpy(), index=pd.MultiIndex.from_arrays(levels + [deviations]))
+    deviation_counts = deviation_counts.groupby(level=list(range(len(levels) + 1))).sum()
+    mad = 1.4826 * grouped_quantiles_from_counts(deviation_counts, [0.5])[0.5].reindex(median.index)
+
+    return pd.DataFrame({'lower': median - k * mad, 'upper': median + k * mad})
+
+def _zscore_fences(counts: pd.Series, k: float) -> pd.DataFrame:
+    values = counts.index.get_level_values(-1).to_numpy(dtype=float)
+    frequencies = counts.to_numpy(dtype=float)
+    groups = counts.index.droplevel(-1)
+    levels = _group_levels(counts)
+
+    n = counts.groupby(level=levels).sum()
+    mean = pd.Series(values * frequencies, index=counts.index).groupby(level=levels).sum() / n
+    squares = frequencies * (values - mean.reindex(groups).to_numpy()) ** 2
+    std = np.sqrt(pd.Series(squares, index=counts.index).groupby(level=levels).sum() / (n - 1))
+
+    return pd.DataFrame({'lower': mean - k * std, 'upper': mean + k * std})
+
+# Outlier filtering methods: functions of (frequency table, threshold) returning the lower
+# and upper fence of every group, and their default thresholds
+OUTLIER_METHODS = {
+    'iqr': _iqr_fences,
+    'mad': _mad_fences,
+    'zscore': _zscore_fences,
+}
+OUTLIER_THRESHOLDS = {'iqr': 1.5, 'mad': 3.5, 'zscore': 3.0}
+
+def outlier_fences(counts: pd.Series, method: str = OUTLIER_METHOD, k: float = None,
+                   min_group_rows: int = OUTLIER_MIN_GROUP_ROWS) -> pd.DataFrame:
     """
-    q1 = np.percentile(data, 25)
-    q3 = np.percentile(data, 75)
+    Compute the outlier fences of every group of a frequency table.
 
-    iqr = q3 - q1
-    lower_bound = q1 - 1.5 * iqr
-    upper_bound = q3 + 1.5 * iqr
+    Groups with fewer than min_group_rows values are too small for robust fences and
+    get the fences computed over all groups.
 
-    outliers = np.where((data < lower_bound) | (data > upper_bound))
+    Parameters:
+    counts (pd.Series): Number of occurrences indexed by (*group, value), see value_counts_by_group.
+    method (str): Name of the method in OUTLIER_METHODS.
+    k (float): Threshold of the method, defaults to OUTLIER_THRESHOLDS[method].
+    min_group_rows (int): Minimum number of values of a group with its own fences.
 
-    return outliers
+    Returns:
+    pd.DataFrame: DataFrame with one row per group and the columns 'rows', 'lower' and 'upper'.
+    """
+    k = OUTLIER_THRESHOLDS[method] if k is None else k
+    fences = OUTLIER_METHODS[method](counts, k)
+    fences.insert(0, 'rows', counts.groupby(level=_group_levels(counts)).sum().astype('int64'))
+
+    small = fences['rows'] < min_group_rows
+    if small.any():
+        overall = pd.concat({'all': counts.groupby(level=-1).sum()})
+        fences.loc[small, ['lower', 'upper']] = OUTLIER_METHODS[method](overall, k).iloc[0].to_numpy()
+
+    return fences
+
+def _fence_positions(df: pd.DataFrame, fences: pd.DataFrame, by: list[str]) -> np.ndarray:
+    if not by:
+        return np.zeros(len(df), dtype=np.intp)
+    keys = pd.Index(df[by[0]]) if len(by) == 1 else pd.MultiIndex.from_frame(df[by])
+    return fences.index.get_indexer(keys)
+
+def outlier_mask(df: pd.DataFrame, fences: pd.DataFrame, column: str, by: list[str]) -> np.ndarray:
+    """
+    Flag the rows whose value lies outside the fences of its group.
+
+    Missing values and rows of groups without fences are not flagged.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame containing the data.
+    fences (pd.DataFrame): Fences per group (see outlier_fences).
+    column (str): Column whose values are checked.
+    by (list[str]): Columns defining the groups, as passed to value_counts_by_group.
+
+    Returns:
+    np.ndarray: Boolean mask, True for outliers.
+    """
+    positions = _fence_positions(df, fences, by)
+    lower = np.append(fences['lower'].to_numpy(dtype=float), -np.inf)[positions]
+    upper = np.append(fences['upper'].to_numpy(dtype=float), np.inf)[positions]
+
+    values = df[column].to_numpy(dtype=float, na_value=np.nan)
+    return (values < lower) | (values > upper)
+
+def filter_outliers(df: pd.DataFrame, column: str, by: list[str] = OUTLIER_GROUPS, method: str = OUTLIER_METHOD,
+                    k: float = None, min_group_rows: int = OUTLIER_MIN_GROUP_ROWS) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Drop the rows with a missing value or an outlier in a column, with fences computed per group.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame containing the data.
+    column (str): Column whose values are checked.
+    by (list[str]): Columns defining the groups, e.g. ['Country', 'year'] or a vehicle segment.
+    method (str): Name of the method in OUTLIER_METHODS ('iqr', 'mad' or 'zscore').
+    k (float): Threshold of the method, defaults to OUTLIER_THRESHOLDS[method].
+    min_group_rows (int): Minimum number of values of a group with its own fences.
+
+    Returns:
+    tuple: Kept rows, and the fences and number of dropped outliers per group.
+    """
+    fences = outlier_fences(value_counts_by_group(df, column, by), method, k, min_group_rows)
+    outliers = outlier_mask(df, fences, column, by)
+
+    positions = _fence_positions(df, fences, by)
+    fences['dropped'] = np.bincount(positions[outliers], minlength=len(fences))
+
+    return df[~outliers & df[column].notna().to_numpy()], fences
+
+def read_emissions_chunks(path: str, chunksize: int = EMISSIONS_CHUNK_ROWS):
+    """
+    Read the per-vehicle emissions CSV in chunks, keeping only the needed columns.
+
+    Parameters:
+    path (str): Path of the emissions CSV file.
+    chunksize (int): Number of rows per chunk.
+
+    Returns:
+    Iterator[pd.DataFrame]: Chunks with the columns and dtypes of EMISSIONS_DTYPES.
+    """
+    return pd.read_csv(path, usecols=list(EMISSIONS_DTYPES), dtype=EMISSIONS_DTYPES, chunksize=chunksize)
+
+def _fit_lines(years: np.ndarray, values: np.ndarray, observed: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Least-squares line through the observed values of every row at once (closed form).
+
+    Rows with a single observation get a flat line through it.
+    """
+    weights = observed.astype(float)
+    x = np.broadcast_to(years - years.mean(), values.shape)
+    y = np.where(observed, values, 0.0)
+
+    n = weights.sum(axis=1)
+    sum_x = (weights * x).sum(axis=1)
+    sum_y = y.sum(axis=1)
+    sum_xx = (weights * x * x).sum(axis=1)
+    sum_xy = (x * y).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominator = n * sum_xx - sum_x ** 2
+        slope = np.where(denominator != 0, (n * sum_xy - sum_x * sum_y) / denominator, 0.0)
+        intercept = (sum_y - slope * sum_x) / n
+
+    return slope[:, None] * x + intercept[:, None], observed
+
+def _impute_linear(years: np.ndarray, values: np.ndarray) -> np.ndarray:
+    fitted, observed = _fit_lines(years, values, ~np.isnan(values))
+    return np.where(observed, values, fitted)
+
+def _impute_log_linear(years: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Exponential trend, fitted on the positive observations only
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_values = np.log(values)
+    fitted, _ = _fit_lines(years, log_values, np.isfinite(log_values))
+    return np.where(np.isnan(values), np.exp(fitted), values)
+
+def _impute_carry_forward(years: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Last observation carried forward; values before the first observation stay missing
+    positions = np.where(~np.isnan(values), np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(positions, axis=1, out=positions)
+    filled = values[np.arange(values.shape[0])[:, None], positions]
+    return np.where(np.isnan(values), filled, values)
+
+# Imputation strategies: functions of (years, values matrix) returning the matrix with NaNs filled
+IMPUTATION_STRATEGIES = {
+    'linear': _impute_linear,
+    'log-linear': _impute_log_linear,
+    'carry-forward': _impute_carry_forward,
+}
+
+def impute_missing_values(df: pd.DataFrame, strategy: str = 'linear', proportion_nan_allowed: float = 0.5) -> pd.DataFrame:
+    """
+    Fill missing values of every row of a (row x year) DataFrame in one vectorized pass.
+
+    Rows with more than proportion_nan_allowed missing values are left untouched.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame with one row per series (e.g. country) and one column per year.
+    strategy (str): Name of the strategy in IMPUTATION_STRATEGIES.
+    proportion_nan_allowed (float): Maximum allowed proportion of missing values.
+
+    Returns:
+    pd.DataFrame: Copy of the DataFrame with the missing values of the eligible rows filled.
+    """
+    years = np.array([int(year) for year in df.columns], dtype=float)
+    values = df.to_numpy(dtype=float)
+
+    proportion_nan = np.isnan(values).mean(axis=1)
+    eligible = (proportion_nan > 0) & (proportion_nan <= proportion_nan_allowed)
+
+    filled = values.copy()
+    if eligible.any():
+        filled[eligible] = IMPUTATION_STRATEGIES[strategy](years, values[eligible])
+
+    return pd.DataFrame(filled, index=df.index, columns=df.columns)
 
 def predict_missing_values(df: pd.DataFrame, country: str, proportion_nan_allowed: float = 0.5):
     """
@@ -35,23 +306,19 @@ def predict_missing_values(df: pd.DataFrame, country: str, proportion_nan_allowe
     Returns:
     tuple: Indices of missing values and their predicted values.
     """
-    is_nan = df.loc[country].isna()
+    row = df.loc[[country]]
+    is_nan = row.iloc[0].isna()
     proportion_nan = is_nan.sum() / len(is_nan)
 
     if proportion_nan > proportion_nan_allowed:
         return (None, None)
     elif proportion_nan == 0:
         return (None, None)
-    
-    filtered_nan_year_index = df.loc[country, :].loc[is_nan].index
-    filtered_non_nan: pd.Series = df.loc[country, :].dropna().astype(float)
-    filtered_non_nan_values: np.ndarray = filtered_non_nan.values.reshape(-1, 1)
 
-    non_nan_years = np.array([int(year) for year in filtered_non_nan.index]).reshape(-1, 1)
-    model = LinearRegression().fit(non_nan_years, filtered_non_nan_values)
+    filled = impute_missing_values(row, 'linear', proportion_nan_allowed)
+    filtered_nan_year_index = row.columns[is_nan.to_numpy()]
 
-    predicted_values = model.predict(np.array([int(year) for year in filtered_nan_year_index]).reshape(-1, 1))
-    return filtered_nan_year_index, predicted_values.flatten()
+    return filtered_nan_year_index, filled.iloc[0][filtered_nan_year_index].to_numpy()
 
 def preprocess_EV_infrastructure(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -66,33 +333,130 @@ def preprocess_EV_infrastructure(df: pd.DataFrame) -> pd.DataFrame:
     new_df = df.copy()
     new_df.rename({'Recharging Power / Recharging Point': 'Power per station (kW)', 'Recharging Power / Total Light Duty PEV fleet': 'Power available per fleet'}, axis=1, inplace=True)
     
-    new_df.loc[:, 'Power per station (kW)'] = new_df['Power per station (kW)'].str.replace(',', '.').astype(float)
-    new_df.loc[:, 'Power available per fleet'] = new_df['Power available per fleet'].str.replace(',', '.').astype(float)
-    new_df = new_df.astype({'Country': 'str', 'Total Recharging Power Output (kW)': 'int32', 'Recharging Points': 'int32', 'Light Duty PEV Fleet': 'int32'}, copy=False)
+    new_df['Power per station (kW)'] = new_df['Power per station (kW)'].str.replace(',', '.').astype(float)
+    new_df['Power available per fleet'] = new_df['Power available per fleet'].str.replace(',', '.').astype(float)
 
-    return new_df
+    return enforce_schema(new_df, 'EV infrastructure')
 
 
-def preprocess_emissions_data(df: pd.DataFrame) -> pd.DataFrame:
+def preprocess_emissions_data(df: pd.DataFrame, by: list[str] = OUTLIER_GROUPS, method: str = OUTLIER_METHOD) -> pd.DataFrame:
     """
     Preprocess the emissions data.
 
     Parameters:
     df (pd.DataFrame): DataFrame containing the raw emissions data.
+    by (list[str]): Columns defining the groups whose outliers are removed, see filter_outliers.
+    method (str): Name of the outlier method in OUTLIER_METHODS.
 
     Returns:
     pd.DataFrame: Preprocessed DataFrame with NaN values dropped and outliers removed.
     """
-    # Drop rows with NaN values in the 'z (Wh/km)' column
-    df.dropna(subset=['z (Wh/km)'], inplace=True)
+    # Drop rows with NaN values and outliers of their group in the 'z (Wh/km)' column
+    df, _ = filter_outliers(df, 'z (Wh/km)', by, method)
+
+    return enforce_schema(df, 'Vehicle emissions')
+
+def stream_emissions_data(src_path: str, dst_path: str, chunksize: int = EMISSIONS_CHUNK_ROWS,
+                          by: list[str] = OUTLIER_GROUPS, method: str = OUTLIER_METHOD) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Preprocess the emissions data without loading the whole file, writing the filtered rows to a CSV file.
+
+    Same result as preprocess_emissions_data, in two passes over the file: the first
+    builds a frequency table of 'z (Wh/km)' per group to get the exact fences, the second
+    drops NaN values and outliers chunk by chunk. Peak memory is bounded by the chunk size
+    and the number of distinct (group, 'z (Wh/km)') values, not by the size of the input.
+
+    Parameters:
+    src_path (str): Path of the raw emissions CSV file.
+    dst_path (str): Path of the CSV file the filtered rows are written to.
+    chunksize (int): Number of rows per chunk.
+    by (list[str]): Columns defining the groups whose outliers are removed, see filter_outliers.
+    method (str): Name of the outlier method in OUTLIER_METHODS.
+
+    Returns:
+    tuple: Fences and number of dropped outliers per group, and the frequency table of the
+    kept values per (Country, year) (see emissions_cube).
+    """
+    # First pass: frequency table of the (non-NaN) values per group
+    counts = None
+    for chunk in read_emissions_chunks(src_path, chunksize):
+        chunk_counts = value_counts_by_group(chunk, 'z (Wh/km)', by)
+        counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+
+    fences = outlier_fences(counts, method)
+    dropped = np.zeros(len(fences), dtype='int64')
+
+    # Second pass: write the rows within the fences of their group and count their values for the cube
+    kept_counts = None
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    for i, chunk in enumerate(read_emissions_chunks(src_path, chunksize)):
+        outliers = outlier_mask(chunk, fences, 'z (Wh/km)', by)
+        dropped += np.bincount(_fence_positions(chunk, fences, by)[outliers], minlength=len(fences))
+
+        chunk = chunk[~outliers & chunk['z (Wh/km)'].notna().to_numpy()]
+        chunk.to_csv(tmp_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+        chunk_counts = value_counts_by_group(chunk, 'z (Wh/km)', ['Country', 'year'])
+        kept_counts = chunk_counts if kept_counts is None else kept_counts.add(chunk_counts, fill_value=0)
+    os.replace(tmp_path, dst_path)
+
+    fences['dropped'] = dropped
+    return fences, kept_counts
+
+def emissions_cube(counts: pd.Series) -> pd.DataFrame:
+    """
+    Aggregate a frequency table of the emissions values into a (country x year) cube.
+
+    The sum, count, mean and exact quartiles of 'z (Wh/km)' of all groups are computed at
+    once from the table. Country codes are replaced by their full names.
+
+    Parameters:
+    counts (pd.Series): Number of occurrences indexed by (Country, year, 'z (Wh/km)'), see value_counts_by_group.
+
+    Returns:
+    pd.DataFrame: DataFrame with one row per country and year and the columns of EMISSIONS_CUBE_COLUMNS.
+    """
+    counts = counts[counts > 0] if counts is not None else pd.Series(dtype=float)
+    if counts.empty:
+        return enforce_schema(pd.DataFrame(columns=EMISSIONS_CUBE_COLUMNS), 'Fossil fuel emissions by cars')
+
+    levels = _group_levels(counts)
+    values = counts.index.get_level_values(-1).to_numpy(dtype=float)
+
+    z_count = counts.groupby(level=levels).sum()
+    z_sum = pd.Series(values * counts.to_numpy(dtype=float), index=counts.index).groupby(level=levels).sum()
+    quartiles = grouped_quantiles_from_counts(counts, [0.25, 0.5, 0.75])
 
-    # Identify outliers in the 'z (Wh/km)' column using the IQR method
-    outlier_indices = get_outlier_indices_IQR_method(df['z (Wh/km)'].to_numpy())
+    cube = pd.DataFrame({
+        'z_sum': z_sum, 'z_count': z_count, 'z_mean': z_sum / z_count,
+        'z_p25': quartiles[0.25], 'z_median': quartiles[0.5], 'z_p75': quartiles[0.75],
+    })
+    cube = cube.rename_axis(['Country', 'year']).reset_index()[EMISSIONS_CUBE_COLUMNS]
+    cube['Country'] = cube['Country'].astype(str).replace(COUNTRY_NAMES)
+
+    return enforce_schema(cube, 'Fossil fuel emissions by cars')
+
+def build_emissions_cube(path: str, chunksize: int = EMISSIONS_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Aggregate a cleaned per-vehicle emissions file into a (country x year) cube.
+
+    The file is streamed in chunks into a frequency table per (Country, year, value), see
+    emissions_cube. The preparation gets the table from stream_emissions_data instead,
+    without reading the cleaned file again.
+
+    Parameters:
+    path (str): Path of the cleaned emissions CSV file (see stream_emissions_data).
+    chunksize (int): Number of rows per chunk.
 
-    # Drop the identified outliers from the DataFrame
-    df = df.drop(index=outlier_indices[0])
+    Returns:
+    pd.DataFrame: DataFrame with one row per country and year and the columns of EMISSIONS_CUBE_COLUMNS.
+    """
+    counts = None
+    for chunk in read_emissions_chunks(path, chunksize):
+        chunk_counts = value_counts_by_group(chunk, 'z (Wh/km)', ['Country', 'year'])
+        counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
 
-    return df
+    return emissions_cube(counts)
 
 def preprocess_EV_sales(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -107,7 +471,7 @@ def preprocess_EV_sales(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     df.replace(np.nan, 0, inplace=True)
     
-    return df
+    return enforce_schema(df, 'EV sales')
 def preprocess_em_and_sales_data(df: pd.DataFrame, df2: pd.DataFrame) -> pd.DataFrame:
     """
     Preprocess the emissions and sales data by predicting missing values, merging, and subsetting.
@@ -119,10 +483,7 @@ def preprocess_em_and_sales_data(df: pd.DataFrame, df2: pd.DataFrame) -> pd.Data
     Returns:
     pd.DataFrame: Preprocessed DataFrame containing merged and cleaned emissions and sales data.
     """
-    for country in df.index:
-        filtered_nan_year_index, predicted_values = predict_missing_values(df, country)
-        if filtered_nan_year_index is not None:
-            df.loc[country, filtered_nan_year_index] = predicted_values
+    df = impute_missing_values(df)
 
     df = df.dropna()
 
@@ -145,7 +506,7 @@ def preprocess_em_and_sales_data(df: pd.DataFrame, df2: pd.DataFrame) -> pd.Data
     # Subsetting data for years 2017 and onwards
     df_17_up = df_all[df_all['Year'] >= 2017]
 
-    return df_17_up
+    return enforce_schema(df_17_up, 'EV Emissions and sales')
 
 def preprocess_EV_prices(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -155,10 +516,40 @@ def preprocess_EV_prices(df: pd.DataFrame) -> pd.DataFrame:
     df (pd.DataFrame): DataFrame containing the raw EV prices data.
 
     Returns:
-    pd.DataFrame: Preprocessed DataFrame with an additional 'Price_category' column.
+    pd.DataFrame: Copy of the DataFrame with an additional 'Price_category' column.
     """
-    price_bins = [0, 30000, 40000, 50000, 60000, 70000, 80000, 90000, 200000]
-    price_labels = ['<30k', '30-40k', '40-50k', '50-60k', '60-70k', '70k-80k', '80k-90k', '>90k']
-    df['Price_category'] = pd.cut(df['Price.DE.'], bins=price_bins, labels=price_labels)
+    df = df.assign(Price_category=pd.cut(df['Price.DE.'], bins=PRICE_BINS, labels=PRICE_CATEGORIES))
+
+    return enforce_schema(df, 'EV prices')
+
+def summarize_EV_prices(df: pd.DataFrame, attributes: list[str] = PRICE_SUMMARY_ATTRIBUTES) -> pd.DataFrame:
+    """
+    Summarize attributes of the EV prices data per price category, as drawn by a boxplot.
+
+    All (price category, attribute) groups are reduced in one grouped pass over the
+    long-format data. Whiskers extend to the most extreme values within 1.5 times the
+    interquartile range of the quartiles, like Vega-Lite's boxplot.
+
+    Parameters:
+    df (pd.DataFrame): Preprocessed EV prices data (see preprocess_EV_prices).
+    attributes (list[str]): Numeric columns to summarize.
+
+    Returns:
+    pd.DataFrame: DataFrame with one row per price category and attribute and its count, mean,
+    quartiles and whiskers.
+    """
+    long = df.melt(id_vars='Price_category', value_vars=attributes, var_name='attribute').dropna()
+    values = long['value'].to_numpy(dtype=float)
+
+    grouped = pd.Series(values, index=long.index).groupby([long['Price_category'], long['attribute']], observed=True)
+    summary = grouped.agg(['count', 'mean'])
+    summary[['q1', 'median', 'q3']] = grouped.quantile([0.25, 0.5, 0.75]).unstack().to_numpy()
+
+    # Whiskers: extreme values within the fences of their group
+    codes = grouped.ngroup().to_numpy()
+    iqr = (summary['q3'] - summary['q1']).to_numpy()
+    within = (values >= (summary['q1'].to_numpy() - 1.5 * iqr)[codes]) & (values <= (summary['q3'].to_numpy() + 1.5 * iqr)[codes])
+    summary['lower_whisker'] = pd.Series(values[within]).groupby(codes[within]).min().to_numpy()
+    summary['upper_whisker'] = pd.Series(values[within]).groupby(codes[within]).max().to_numpy()
 
-    return df
+    return enforce_schema(summary.reset_index(), 'EV prices summary')
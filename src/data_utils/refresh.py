@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+# Last period ingested per Eurostat dataset, used to request only newer periods
+REFRESH_STATE_PATH = os.environ.get('DSS_REFRESH_STATE_PATH', 'data/refresh_state.json')
+
+def read_state() -> dict:
+    """
+    Read the incremental refresh state.
+
+    Returns:
+    dict: Dictionary where keys are dataset names and values hold the last period ingested and the refresh time.
+    """
+    try:
+        with open(REFRESH_STATE_PATH, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def last_period(dataset: str) -> str | None:
+    """
+    Get the last period ingested for a dataset.
+
+    Parameters:
+    dataset (str): Dataset name (e.g. 'sales').
+
+    Returns:
+    str | None: Last period (e.g. '2023'), or None if the dataset was never ingested.
+    """
+    return read_state().get(dataset, {}).get('last_period')
+
+def record_period(dataset: str, period: str) -> None:
+    """
+    Record the last period ingested for a dataset.
+
+    Parameters:
+    dataset (str): Dataset name (e.g. 'sales').
+    period (str): Last period present in the stored table.
+    """
+    state = read_state()
+    state[dataset] = {'last_period': str(period), 'refreshed_at': time.time()}
+
+    os.makedirs(os.path.dirname(REFRESH_STATE_PATH) or '.', exist_ok=True)
+    tmp_path = f"{REFRESH_STATE_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, REFRESH_STATE_PATH)
+
+def merge_periods(stored: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge newly fetched periods into a stored (country x period) table.
+
+    The periods of the delta replace the stored columns of the same name as a whole;
+    countries that only appear in the delta are appended, with missing values for the
+    other periods.
+
+    Parameters:
+    stored (pd.DataFrame): Stored table with countries as index and periods as columns.
+    delta (pd.DataFrame): Table of the newly fetched periods.
+
+    Returns:
+    pd.DataFrame: Merged table with the periods in ascending order.
+    """
+    stored = stored.set_axis(stored.index.astype(str), axis=0)
+    delta = delta.set_axis(delta.index.astype(str), axis=0)
+
+    index = stored.index.append(delta.index.difference(stored.index, sort=False))
+    merged = stored.reindex(index)
+    for period in delta.columns:
+        merged[period] = delta[period].reindex(index)
+
+    return merged[sorted(merged.columns, key=str)]
+
+def changed_rows(old: pd.DataFrame, new: pd.DataFrame) -> pd.Index | None:
+    """
+    Get the rows of a table that are new or differ from its previous version.
+
+    Parameters:
+    old (pd.DataFrame): Previous version of the table.
+    new (pd.DataFrame): New version of the table.
+
+    Returns:
+    pd.Index | None: Index labels of the changed rows, or None if the columns changed (the whole table must be rewritten).
+    """
+    if [str(column) for column in old.columns] != [str(column) for column in new.columns]:
+        return None
+
+    new = new.set_axis(new.index.astype(str), axis=0)
+    old = old.set_axis(old.index.astype(str), axis=0).reindex(new.index)
+    old.columns = new.columns
+
+    unchanged = new.eq(old).fillna(False).all(axis=1)
+
+    return new.index[~unchanged.to_numpy(dtype=bool)]
@@ -0,0 +1,95 @@
+import pandas as pd
+
+# Price categories of the EV prices data, in ascending order (see preprocess.PRICE_BINS)
+PRICE_CATEGORIES = ['<30k', '30-40k', '40-50k', '50-60k', '60-70k', '70k-80k', '80k-90k', '>90k']
+
+# Narrowest dtypes of every table held by the dashboard. 'columns' maps column names to
+# dtypes, 'default' applies to all other columns (e.g. the year columns of the wide EV
+# sales table) and 'index' to the index. Counts use nullable integers so missing values
+# survive; measurements shown verbatim in chart tooltips stay float64 to avoid float32
+# rounding artefacts (e.g. 146.3 displayed as 146.3000030517578).
+SCHEMAS = {
+    'EV sales': {
+        'index': 'category',
+        'default': 'Int32',
+    },
+    'Vehicle emissions': {
+        'columns': {'ID': 'Int64', 'Country': 'category', 'z (Wh/km)': 'float32', 'year': 'int16'},
+    },
+    'Fossil fuel emissions by cars': {
+        'columns': {
+            'Country': 'category', 'year': 'int16', 'z_sum': 'float32', 'z_count': 'Int32',
+            'z_mean': 'float32', 'z_p25': 'float32', 'z_median': 'float32', 'z_p75': 'float32',
+        },
+    },
+    'EV infrastructure': {
+        'columns': {
+            'Country': 'category', 'Power per station (kW)': 'float32', 'Power available per fleet': 'float32',
+            'Total Recharging Power Output (kW)': 'Int32', 'Recharging Points': 'Int32', 'Light Duty PEV Fleet': 'Int32',
+        },
+    },
+    'EV Emissions and sales': {
+        'columns': {'Country': 'category', 'Year': 'int16', 'Emissions': 'float64', 'Nr_of_new_EVs': 'Int32'},
+    },
+    'EV prices': {
+        'columns': {
+            'Battery': 'float32', 'Efficiency': 'Int16', 'Fast_charge': 'Int16', 'Price.DE.': 'Int32',
+            'Range': 'Int16', 'Top_speed': 'Int16', 'acceleration..0.100.': 'float32',
+            'Price_category': pd.CategoricalDtype(PRICE_CATEGORIES, ordered=True),
+        },
+    },
+    'EV prices summary': {
+        'columns': {
+            'Price_category': pd.CategoricalDtype(PRICE_CATEGORIES, ordered=True), 'attribute': 'category', 'count': 'Int32',
+            'mean': 'float64', 'lower_whisker': 'float64', 'q1': 'float64', 'median': 'float64', 'q3': 'float64', 'upper_whisker': 'float64',
+        },
+    },
+}
+
+def _schema(table_name: str) -> dict:
+    for name, schema in SCHEMAS.items():
+        if name.replace(" ", "") == table_name.replace(" ", ""):
+            return schema
+    return None
+
+def enforce_schema(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """
+    Cast the columns (and index) of a table to the dtypes declared in SCHEMAS.
+
+    Columns that are not declared and have no default dtype are left as they are.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame containing the table.
+    table_name (str): Name of the table (with or without spaces).
+
+    Returns:
+    pd.DataFrame: DataFrame with the declared dtypes.
+    """
+    schema = _schema(table_name)
+    if schema is None:
+        return df
+
+    columns = schema.get('columns', {})
+    dtypes = {column: columns.get(column, schema.get('default')) for column in df.columns}
+    dtypes = {column: dtype for column, dtype in dtypes.items() if dtype is not None}
+
+    df = df.astype(dtypes)
+    if 'index' in schema:
+        df.index = df.index.astype(schema['index'])
+
+    return df
+
+def memory_report(tables: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Report the in-memory size of tables.
+
+    Parameters:
+    tables (dict[str, pd.DataFrame]): Dictionary where keys are table names and values are DataFrames.
+
+    Returns:
+    pd.DataFrame: One row per table with its number of rows and columns and its size in bytes (deep).
+    """
+    rows = [(name, len(df), len(df.columns), int(df.memory_usage(index=True, deep=True).sum()))
+            for name, df in tables.items()]
+
+    return pd.DataFrame(rows, columns=['Table', 'Rows', 'Columns', 'Bytes']).set_index('Table')
@@ -1,90 +1,176 @@
-import requests
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
 import pandas as pd
+from data_utils.fetch import fetch
+from data_utils.http_cache import CachedResponse, artifact_path, evict
+
+# New electric passenger car registrations per country and year
+SALES_URL = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/road_eqr_carpda/?format=JSON&lang=en&freq=A&unit=NR&mot_nrg=ELC&geo=EU27_2020&geo=BG&geo=CZ&geo=DK&geo=DE&geo=EE&geo=IE&geo=EL&geo=ES&geo=FR&geo=HR&geo=IT&geo=CY&geo=LV&geo=LT&geo=LU&geo=HU&geo=MT&geo=NL&geo=AT&geo=PL&geo=PT&geo=RO&geo=SI&geo=SK&geo=FI&geo=SE&geo=IS&geo=LI&geo=NO&geo=CH&geo=UK&geo=BA&geo=ME&geo=MD&geo=GE&geo=AL&geo=TR&geo=UA&geo=XK&geo=BE&time=2012&time=2013&time=2014&time=2015&time=2016&time=2017&time=2018&time=2019&time=2020&time=2021&time=2022&time=2023"
 
-def scrape_sales_data() -> pd.DataFrame:
+# Average CO2 emissions per km from new passenger cars
+EM_URL = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/sdg_13_31/?format=JSON&lang=en"
+
+def incremental_url(url: str, since_period: str) -> str:
     """
-    Scrape EV sales data from the Eurostat API.
+    Get the URL requesting only the periods of a dataset from a given period on.
+
+    The explicit time filters of the URL are replaced by the API's sinceTimePeriod, so
+    the response holds the given period (which may have been revised) and newer ones.
+
+    Parameters:
+    url (str): Eurostat API URL of the dataset.
+    since_period (str): First period to request, e.g. '2023'.
 
     Returns:
-    pd.DataFrame: DataFrame containing the scraped EV sales data.
+    str: URL of the incremental request.
     """
-    url = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/road_eqr_carpda/?format=JSON&lang=en&freq=A&unit=NR&mot_nrg=ELC&geo=EU27_2020&geo=BG&geo=CZ&geo=DK&geo=DE&geo=EE&geo=IE&geo=EL&geo=ES&geo=FR&geo=HR&geo=IT&geo=CY&geo=LV&geo=LT&geo=LU&geo=HU&geo=MT&geo=NL&geo=AT&geo=PL&geo=PT&geo=RO&geo=SI&geo=SK&geo=FI&geo=SE&geo=IS&geo=LI&geo=NO&geo=CH&geo=UK&geo=BA&geo=ME&geo=MD&geo=GE&geo=AL&geo=TR&geo=UA&geo=XK&geo=BE&time=2012&time=2013&time=2014&time=2015&time=2016&time=2017&time=2018&time=2019&time=2020&time=2021&time=2022&time=2023"
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if name not in ('time', 'sinceTimePeriod')]
+    query.append(('sinceTimePeriod', since_period))
 
-    response = requests.get(url)
-    data = response.json()
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
 
+def decode_jsonstat(data: dict) -> tuple[np.ndarray, dict[str, list[str]]]:
+    """
+    Decode a JSON-stat 2.0 dataset into a dense NumPy array.
+
+    The flat 'value' object is keyed by row-major positions over all dimensions, so
+    the whole payload is scattered into a float array in a single vectorized pass and
+    reshaped to the dataset's dimension sizes. Works for any number of dimensions.
+
+    Parameters:
+    data (dict): Parsed JSON-stat response (as returned by the Eurostat API).
+
+    Returns:
+    tuple: Array of shape data['size'] (missing cells are NaN) and a dict mapping each
+    dimension id to its category labels in array order.
+    """
+    dim_ids = data['id']
+    shape = tuple(data['size'])
     values = data['value']
-    geo_labels = data['dimension']['geo']['category']['label']
-    geo_indices = data['dimension']['geo']['category']['index']
-    time_labels = data['dimension']['time']['category']['label']
-    time_indices = data['dimension']['time']['category']['index']
 
-    sorted_countries = [geo_labels[code] for code in sorted(geo_indices, key=geo_indices.get)]
-    sorted_times = sorted(time_indices, key=time_indices.get)
+    flat = np.full(int(np.prod(shape)), np.nan)
+    if isinstance(values, dict):
+        if values:
+            positions = np.fromiter(map(int, values.keys()), dtype=np.int64, count=len(values))
+            flat[positions] = np.array(list(values.values()), dtype=float)
+    else:
+        flat[:] = np.array(values, dtype=float)
 
-    df = pd.DataFrame(index=sorted_countries, columns=sorted_times)
+    labels = {}
+    for dim_id in dim_ids:
+        category = data['dimension'][dim_id]['category']
+        codes = sorted(category['index'], key=category['index'].get)
+        category_labels = category.get('label', {})
+        labels[dim_id] = [category_labels.get(code, code) for code in codes]
 
-    for index, value in values.items():
-        # Determine which country and time period the value belongs to
-        country_idx = int(index) // len(time_indices)
-        time_idx = int(index) % len(time_indices)
+    return flat.reshape(shape), labels
 
-        # Get the actual country name and time label
-        country_code = list(geo_indices.keys())[country_idx]
-        country = geo_labels[country_code]
-        time = time_labels[list(time_indices.keys())[time_idx]]
+def jsonstat_to_frame(data: dict, index: str, columns: str) -> pd.DataFrame:
+    """
+    Decode a JSON-stat dataset into a 2-D DataFrame over two of its dimensions.
 
-        # Insert the value into the correct place in the DataFrame
-        df.loc[country, time] = value
-    
-    sales_data = df
-    
-    return sales_data
+    Parameters:
+    data (dict): Parsed JSON-stat response.
+    index (str): Dimension id used for the rows (e.g. 'geo').
+    columns (str): Dimension id used for the columns (e.g. 'time').
 
-def scrape_em_and_sales() -> pd.DataFrame:
+    Returns:
+    pd.DataFrame: DataFrame of float values labelled by the category labels.
     """
-    Scrape emissions and sales data from the Eurostat API and merge with local CSV data.
+    return _to_frame(*decode_jsonstat(data), index, columns)
+
+def decode_response(response: CachedResponse) -> tuple[np.ndarray, dict[str, list[str]]]:
+    """
+    Decode a cached JSON-stat response, reusing the decoded copy when the body is unchanged.
+
+    The decoded array is stored next to the cache entry, so a response served from the
+    cache or revalidated with a 304 skips JSON parsing and decoding entirely.
+
+    Parameters:
+    response (CachedResponse): Response returned by the fetch layer.
 
     Returns:
-    pd.DataFrame: DataFrame containing the merged emissions and sales data.
+    tuple: Decoded array and dimension labels (see decode_jsonstat).
     """
-    # Get data "Average CO2 emissions per km from new passenger cars" with API
-    url = "https://ec.europa.eu/eurostat/api/dissemination/statistics/1.0/data/sdg_13_31/?format=JSON&lang=en"
+    decoded_path = artifact_path(response.key, 'decoded.npz')
 
-    # Request the data
-    response = requests.get(url)
+    if response.status != 'downloaded' and os.path.exists(decoded_path):
+        with np.load(decoded_path, allow_pickle=False) as decoded:
+            dim_ids = decoded['dims'].tolist()
+            labels = {dim_id: decoded[f'labels_{i}'].tolist() for i, dim_id in enumerate(dim_ids)}
+            return decoded['values'], labels
 
-    # Parse the JSON response
-    data = response.json()
+    array, labels = decode_jsonstat(json.loads(response.body))
 
-    values = data['value']
-    geo_labels = data['dimension']['geo']['category']['label']
-    geo_indices = data['dimension']['geo']['category']['index']
-    time_labels = data['dimension']['time']['category']['label']
-    time_indices = data['dimension']['time']['category']['index']
+    labels_arrays = {f'labels_{i}': np.array(dim_labels, dtype=str) for i, dim_labels in enumerate(labels.values())}
+    tmp_path = f"{decoded_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, values=array, dims=np.array(list(labels), dtype=str), **labels_arrays)
+    os.replace(tmp_path, decoded_path)
+
+    # The decoded copy counts towards the cache size
+    evict(keep=response.key)
+
+    return array, labels
+
+def _to_frame(array: np.ndarray, labels: dict[str, list[str]], index: str, columns: str) -> pd.DataFrame:
+    dim_ids = list(labels)
 
-    # Create a sorted list of countries based on the index
-    sorted_countries = [geo_labels[code] for code in sorted(geo_indices, key=geo_indices.get)]
-    sorted_times = sorted(time_indices, key=time_indices.get)
+    # All other dimensions must be fixed by the query (size 1) to fit in two axes
+    extra = [dim for dim, size in zip(dim_ids, array.shape) if dim not in (index, columns) and size != 1]
+    if extra:
+        raise ValueError(f"Dimensions {extra} have more than one category; filter them in the query")
 
-    # Convert time_labels (years) to integers
-    time_years = [int(time_labels[code]) for code in sorted_times]
+    array = array.reshape([size for dim, size in zip(dim_ids, array.shape) if dim in (index, columns)])
+    if dim_ids.index(index) > dim_ids.index(columns):
+        array = array.T
+
+    return pd.DataFrame(array, index=labels[index], columns=labels[columns])
+
+def scrape_sales_data(response: CachedResponse = None, since_period: str = None) -> pd.DataFrame:
+    """
+    Scrape EV sales data from the Eurostat API.
+
+    Parameters:
+    response (CachedResponse): Pre-fetched response (see data_utils.fetch.fetch), fetched if not given.
+    since_period (str): Fetch only this period and newer ones (see incremental_url), defaults to all periods.
+
+    Returns:
+    pd.DataFrame: DataFrame containing the scraped EV sales data.
+    """
+    if response is None:
+        response = fetch(SALES_URL if since_period is None else incremental_url(SALES_URL, since_period))
 
-    # Create a DataFrame to store data from the JSON response
-    df = pd.DataFrame(index=sorted_countries, columns=time_years)
+    df = _to_frame(*decode_response(response), index='geo', columns='time')
 
-    # Insert the values from the JSON response in the DataFrame
-    for index, value in values.items():
-        country_id = int(index) // len(time_indices)
-        time_idx = int(index) % len(time_indices)
+    sales_data = df
+    
+    return sales_data
+
+def scrape_em_and_sales(response: CachedResponse = None) -> pd.DataFrame:
+    """
+    Scrape emissions and sales data from the Eurostat API and merge with local CSV data.
+
+    Parameters:
+    response (CachedResponse): Pre-fetched response (see data_utils.fetch.fetch), fetched if not given.
+
+    Returns:
+    pd.DataFrame: DataFrame containing the merged emissions and sales data.
+    """
+    # Get data "Average CO2 emissions per km from new passenger cars" with API
+    if response is None:
+        response = fetch(EM_URL)
 
-        # Get the actual country name and time label
-        country_code = list(geo_indices.keys())[country_id]
-        country = geo_labels[country_code]
-        time = int(time_labels[list(time_indices.keys())[time_idx]])
+    # Decode the JSON-stat payload into a (country x year) DataFrame
+    df = _to_frame(*decode_response(response), index='geo', columns='time')
 
-        # Insert the value into the correct place in the DataFrame
-        df.loc[country, time] = value
+    # Convert time labels (years) to integers
+    df.columns = df.columns.astype(int)
 
     # Load additional data from a local CSV file
     csv_file_path = 'data/cleaned_NoEVS_data.csv'
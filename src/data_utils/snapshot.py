@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Directory holding one sub-directory per snapshot version and the CURRENT pointer
+SNAPSHOT_DIR = os.environ.get('DSS_SNAPSHOT_DIR', 'data/snapshot')
+
+# Number of snapshot versions kept on disk (readers may still be on the previous one)
+KEEP_VERSIONS = 2
+
+# Rows per Parquet row group; the min/max statistics of every row group let filtered
+# reads skip the groups that cannot match
+ROW_GROUP_ROWS = 16_384
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+def clean_table_name(name: str) -> str:
+    """
+    Get the storage name of a table, as used for the database tables and snapshot files.
+
+    Parameters:
+    name (str): Table name, e.g. 'EV sales'.
+
+    Returns:
+    str: Name without spaces, e.g. 'EVsales'.
+    """
+    return name.replace(" ", "")
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def _atomic_write_text(path: str, text: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def current_version() -> str | None:
+    """
+    Get the version of the published snapshot.
+
+    Returns:
+    str | None: Version identifier, or None if no snapshot was published yet.
+    """
+    try:
+        with open(os.path.join(SNAPSHOT_DIR, CURRENT_FILE), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def read_manifest(version: str = None) -> dict:
+    """
+    Read the manifest of a snapshot version.
+
+    Parameters:
+    version (str): Snapshot version, defaults to the published one.
+
+    Returns:
+    dict: Manifest with the version, creation time and per-table file, schema, row count and hash.
+    """
+    version = version or current_version()
+    if version is None:
+        raise FileNotFoundError(f"No snapshot has been published in {SNAPSHOT_DIR}")
+
+    with open(os.path.join(SNAPSHOT_DIR, version, MANIFEST_FILE), 'r') as f:
+        return json.load(f)
+
+def _create_staging_dir() -> str:
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    staging_dir = os.path.join(SNAPSHOT_DIR, f".staging-{os.getpid()}-{time.time_ns()}")
+    os.makedirs(staging_dir)
+
+    return staging_dir
+
+def _write_tables(staging_dir: str, tables: dict[str, pd.DataFrame]) -> dict:
+    manifest_tables = {}
+    for name, df in tables.items():
+        table_name = clean_table_name(name)
+        file_name = f"{table_name}.parquet"
+        path = os.path.join(staging_dir, file_name)
+        df.to_parquet(path, engine='pyarrow', row_group_size=ROW_GROUP_ROWS)
+
+        # Uncompressed Arrow IPC copy, memory-mapped without decoding by map_table
+        arrow_file = f"{table_name}.arrow"
+        arrow_table = pa.Table.from_pandas(df)
+        with pa.OSFile(os.path.join(staging_dir, arrow_file), 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table, max_chunksize=ROW_GROUP_ROWS)
+
+        manifest_tables[table_name] = {
+            'file': file_name,
+            'arrow_file': arrow_file,
+            'rows': len(df),
+            'schema': {str(column): str(dtype) for column, dtype in df.dtypes.items()},
+            'sha256': _file_sha256(path),
+        }
+
+    return manifest_tables
+
+def _publish(staging_dir: str, manifest_tables: dict) -> str:
+    content_hash = hashlib.sha256(json.dumps(
+        {name: table['sha256'] for name, table in manifest_tables.items()}, sort_keys=True).encode()).hexdigest()
+
+    published = current_version()
+    if published is not None and published.endswith(content_hash[:12]):
+        shutil.rmtree(staging_dir)
+        return published
+
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{content_hash[:12]}"
+    manifest = {'version': version, 'created_at': time.time(), 'tables': manifest_tables}
+    with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(staging_dir, os.path.join(SNAPSHOT_DIR, version))
+    _atomic_write_text(os.path.join(SNAPSHOT_DIR, CURRENT_FILE), version)
+    prune()
+
+    return version
+
+def write_snapshot(tables: dict[str, pd.DataFrame]) -> str:
+    """
+    Write tables as a new snapshot version and publish it atomically.
+
+    Every table is stored as its own Parquet file, plus an uncompressed Arrow IPC file
+    for memory-mapped reads (see map_table). The version directory is complete
+    before the CURRENT pointer is swapped, so readers never see a partial snapshot.
+    If the content equals the published snapshot, nothing is written.
+
+    Parameters:
+    tables (dict[str, pd.DataFrame]): Dictionary where keys are table names and values are DataFrames.
+
+    Returns:
+    str: Version of the published snapshot.
+    """
+    staging_dir = _create_staging_dir()
+
+    return _publish(staging_dir, _write_tables(staging_dir, tables))
+
+def update_snapshot(tables: dict[str, pd.DataFrame]) -> str:
+    """
+    Publish a new snapshot version in which only the given tables are replaced.
+
+    The files of all other tables are hard-linked from the published version, so an
+    incremental refresh writes only the tables it changed.
+
+    Parameters:
+    tables (dict[str, pd.DataFrame]): Dictionary where keys are the names of the changed tables and values are DataFrames.
+
+    Returns:
+    str: Version of the published snapshot.
+    """
+    published = current_version()
+    if published is None:
+        return write_snapshot(tables)
+
+    manifest = read_manifest(published)
+    staging_dir = _create_staging_dir()
+    manifest_tables = _write_tables(staging_dir, tables)
+
+    for table_name, table in manifest['tables'].items():
+        if table_name in manifest_tables:
+            continue
+        for file_name in filter(None, [table['file'], table.get('arrow_file')]):
+            src = os.path.join(SNAPSHOT_DIR, published, file_name)
+            dst = os.path.join(staging_dir, file_name)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+        manifest_tables[table_name] = table
+
+    return _publish(staging_dir, manifest_tables)
+
+def _parquet_filters(where: dict, index_field: str = None) -> list[tuple]:
+    filters = []
+    for column, condition in where.items():
+        # An unnamed index is addressed as 'index', like its column in the database
+        field = index_field if column == 'index' and index_field else column
+        if isinstance(condition, range) and condition.step == 1:
+            filters += [(field, '>=', condition.start), (field, '<', condition.stop)]
+        elif isinstance(condition, (list, tuple, set, frozenset, range)):
+            filters.append((field, 'in', list(condition)))
+        else:
+            filters.append((field, '==', condition))
+
+    return filters
+
+def _table_entry(name: str, version: str = None) -> tuple[str, dict]:
+    manifest = read_manifest(version)
+    table_name = clean_table_name(name)
+    if table_name not in manifest['tables']:
+        raise KeyError(f"Table {table_name} is not in snapshot {manifest['version']}")
+
+    return os.path.join(SNAPSHOT_DIR, manifest['version']), manifest['tables'][table_name]
+
+def read_table(name: str, columns: list[str] = None, version: str = None, where: dict = None) -> pd.DataFrame:
+    """
+    Read one table from a snapshot, memory-mapping its Parquet file.
+
+    Only the requested columns are read and filters are pushed down to the Parquet
+    reader, which skips row groups whose statistics cannot match.
+
+    Parameters:
+    name (str): Table name (with or without spaces).
+    columns (list[str]): Columns to read, defaults to all of them. The index is always read.
+    version (str): Snapshot version, defaults to the published one.
+    where (dict): Row filters by column: a list of values, a range or a single value.
+
+    Returns:
+    pd.DataFrame: DataFrame containing the table.
+    """
+    version_dir, table = _table_entry(name, version)
+    path = os.path.join(version_dir, table['file'])
+
+    filters = None
+    if where:
+        index_columns = pq.read_schema(path, memory_map=True).pandas_metadata['index_columns']
+        index_field = next((field for field in index_columns if isinstance(field, str)), None)
+        filters = _parquet_filters(where, index_field)
+
+        # Nothing matches an empty list of values (and Arrow cannot type an empty set)
+        if any(op == 'in' and not values for _, op, values in filters):
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+            return parquet_file.read_row_groups([], columns=columns, use_pandas_metadata=True).to_pandas()
+
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True, use_pandas_metadata=True).to_pandas()
+
+def map_table(name: str, columns: list[str] = None, version: str = None, where: dict = None) -> pd.DataFrame:
+    """
+    Map one table of a snapshot into memory without copying it.
+
+    The Arrow IPC file of the table is memory-mapped read-only and wrapped in a DataFrame
+    with pd.ArrowDtype columns, so all processes reading the same version share the pages
+    of the OS page cache instead of holding their own copy. Filtered reads copy only the
+    matching rows. Mapped files stay valid after their version is pruned, as long as the
+    DataFrame is referenced. Snapshots written before Arrow files were published are read
+    from Parquet (see read_table).
+
+    Parameters:
+    name (str): Table name (with or without spaces).
+    columns (list[str]): Columns to map, defaults to all of them. The index is always mapped.
+    version (str): Snapshot version, defaults to the published one.
+    where (dict): Row filters by column: a list of values, a range or a single value.
+
+    Returns:
+    pd.DataFrame: Read-only DataFrame backed by the memory-mapped file.
+    """
+    version_dir, table = _table_entry(name, version)
+    if 'arrow_file' not in table:
+        return read_table(name, columns, version, where)
+
+    with pa.ipc.open_file(pa.memory_map(os.path.join(version_dir, table['arrow_file']), 'r')) as reader:
+        arrow_table = reader.read_all()
+
+    index_columns = [field for field in arrow_table.schema.pandas_metadata['index_columns'] if isinstance(field, str)]
+    if where:
+        filters = _parquet_filters(where, index_columns[0] if index_columns else None)
+        if any(op == 'in' and not values for _, op, values in filters):
+            arrow_table = arrow_table.slice(0, 0)
+        else:
+            arrow_table = arrow_table.filter(pq.filters_to_expression(filters))
+
+    if columns is not None:
+        arrow_table = arrow_table.select(list(columns) + [field for field in index_columns if field not in columns])
+
+    return arrow_table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def prune(keep: int = KEEP_VERSIONS) -> None:
+    """
+    Delete old snapshot versions, keeping the most recent ones.
+
+    Parameters:
+    keep (int): Number of versions to keep, including the published one.
+    """
+    published = current_version()
+    versions = sorted(name for name in os.listdir(SNAPSHOT_DIR)
+                      if os.path.isfile(os.path.join(SNAPSHOT_DIR, name, MANIFEST_FILE)))
+
+    for version in versions[:-keep]:
+        if version != published:
+            shutil.rmtree(os.path.join(SNAPSHOT_DIR, version), ignore_errors=True)
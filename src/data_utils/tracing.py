@@ -0,0 +1,262 @@
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+# Record timing spans of every rerun (off by default; spans are then no-ops)
+ENABLED = os.environ.get('DSS_TRACE', '').lower() in ('1', 'true', 'yes')
+
+# Where finished spans are exported: 'log' (JSON lines), 'otel' (OpenTelemetry) or 'none'
+EXPORTER = os.environ.get('DSS_TRACE_EXPORTER', 'log')
+
+# File receiving the JSON lines (or the console exporter's output), defaults to stderr
+TRACE_FILE = os.environ.get('DSS_TRACE_FILE')
+
+# Span kinds: data loading, pandas transformations, chart building and st.*_chart emission
+KINDS = ('load', 'transform', 'build', 'emit', 'page')
+
+# Spans of the current rerun, per script thread (every session reruns in its own thread)
+_local = threading.local()
+_reruns = itertools.count(1)
+_export_lock = threading.Lock()
+_tracer = None
+
+class Span:
+    """
+    A timed section of a rerun, recorded in the order it was entered.
+    """
+    __slots__ = ('name', 'kind', 'attributes', 'start', 'seconds', 'parent', 'depth', '_start', '_otel')
+
+    def __init__(self, name: str, kind: str, attributes: dict):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.seconds = None
+
+    def set(self, key: str, value) -> None:
+        """
+        Set an attribute of the span (exported with it).
+
+        Parameters:
+        key (str): Attribute name.
+        value: JSON-serializable attribute value.
+        """
+        self.attributes[key] = value
+
+    def __enter__(self):
+        spans, stack = _rerun_state()
+        self.parent = stack[-1] if stack else None
+        self.depth = len(stack)
+        stack.append(len(spans))
+        spans.append(self)
+
+        self._otel = None
+        if EXPORTER == 'otel':
+            self._otel = _otel_tracer().start_as_current_span(self.name, attributes={'dss.kind': self.kind})
+            self._otel.__enter__()
+
+        self.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.seconds = time.perf_counter() - self._start
+        _rerun_state()[1].pop()
+
+        if self._otel is not None:
+            otel_span = _otel_current_span()
+            for key, value in self.attributes.items():
+                otel_span.set_attribute(f"dss.{key}", value if isinstance(value, (str, int, float, bool)) else str(value))
+            self._otel.__exit__(exc_type, exc, traceback)
+        elif EXPORTER == 'log':
+            _export_log(self)
+
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, key: str, value) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name: str, kind: str = 'transform', **attributes):
+    """
+    Time a section of the current rerun.
+
+    When tracing is disabled a shared no-op object is returned, so instrumented code
+    pays a single function call.
+
+    Parameters:
+    name (str): Name of the span, e.g. 'load:EVsales'.
+    kind (str): One of KINDS.
+    **attributes: Attributes exported with the span.
+
+    Returns:
+    Span: Context manager timing the section.
+    """
+    if not ENABLED:
+        return _NOOP_SPAN
+    return Span(name, kind, attributes)
+
+def _rerun_state() -> tuple[list, list]:
+    if not hasattr(_local, 'spans'):
+        _local.spans, _local.stack, _local.rerun, _local.page = [], [], next(_reruns), None
+    return _local.spans, _local.stack
+
+def start_rerun(page: str = None) -> None:
+    """
+    Start collecting the spans of a new rerun in the current thread.
+
+    Parameters:
+    page (str): Page rendered by the rerun, exported with every span.
+    """
+    if not ENABLED:
+        return
+    _local.spans, _local.stack, _local.rerun, _local.page = [], [], next(_reruns), page
+
+def current_spans() -> list[Span]:
+    """
+    Get the spans of the current rerun, in the order they were entered.
+
+    Returns:
+    list[Span]: Spans of the current thread's rerun (finished ones have seconds set).
+    """
+    return list(_rerun_state()[0]) if ENABLED else []
+
+def self_times(spans: list[Span]) -> list[float]:
+    """
+    Get the time spent in every span itself, excluding the spans nested in it.
+
+    Parameters:
+    spans (list[Span]): Spans of a rerun (see current_spans).
+
+    Returns:
+    list[float]: Self time in seconds of every span, in the same order.
+    """
+    times = [span.seconds or 0.0 for span in spans]
+    for span in spans:
+        if span.parent is not None and span.seconds is not None:
+            times[span.parent] -= span.seconds
+
+    return [max(0.0, seconds) for seconds in times]
+
+def _export_log(span: Span) -> None:
+    record = {
+        'ts': round(span.start, 6),
+        'rerun': _local.rerun,
+        'page': _local.page,
+        'name': span.name,
+        'kind': span.kind,
+        'ms': round(span.seconds * 1000, 3),
+        'depth': span.depth,
+        **span.attributes,
+    }
+    line = json.dumps(record, default=str) + '\n'
+
+    with _export_lock:
+        if TRACE_FILE:
+            with open(TRACE_FILE, 'a') as f:
+                f.write(line)
+        else:
+            sys.stderr.write(line)
+
+def _otel_tracer():
+    # OpenTelemetry is optional: spans go to the OTLP collector configured by the standard
+    # OTEL_EXPORTER_OTLP_* variables if the exporter is installed, else to the console
+    global _tracer
+    with _export_lock:
+        if _tracer is None:
+            from opentelemetry import trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                exporter = OTLPSpanExporter()
+            except ImportError:
+                exporter = ConsoleSpanExporter(out=open(TRACE_FILE, 'a') if TRACE_FILE else sys.stderr)
+
+            provider = TracerProvider(resource=Resource.create({'service.name': 'dss-dashboard'}))
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+            trace.set_tracer_provider(provider)
+            _tracer = trace.get_tracer('dss_dashboard')
+
+    return _tracer
+
+def _otel_current_span():
+    from opentelemetry import trace
+
+    return trace.get_current_span()
+
+def process_memory() -> dict:
+    """
+    Get the memory used by the current process.
+
+    Returns:
+    dict: Resident set size and its peak in bytes (None where the platform does not report it).
+    """
+    rss = None
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        peak = None
+
+    return {'rss_bytes': rss, 'peak_rss_bytes': peak}
+
+def render_debug_panel(cache_stats: dict[str, dict]) -> None:
+    """
+    Show the timing breakdown of the current rerun, cache hit rates and process memory in the sidebar.
+
+    Parameters:
+    cache_stats (dict[str, dict]): Dictionary where keys are cache names and values hold their 'hits' and 'misses'.
+    """
+    import pandas as pd
+    import streamlit as st
+
+    spans = current_spans()
+    self_seconds = self_times(spans)
+
+    with st.sidebar.expander("Performance of this rerun", expanded=True):
+        total = sum(span.seconds or 0.0 for span in spans if span.parent is None)
+        st.write(f"Total: {total * 1000:.1f} ms")
+
+        by_kind = {}
+        for span, seconds in zip(spans, self_seconds):
+            kind = 'other' if span.kind == 'page' else span.kind
+            by_kind[kind] = by_kind.get(kind, 0.0) + seconds * 1000
+        st.dataframe(pd.DataFrame({'ms': by_kind}).round(1))
+
+        st.dataframe(pd.DataFrame({
+            'span': ['  ' * span.depth + span.name for span in spans],
+            'kind': [span.kind for span in spans],
+            'ms': [round((span.seconds or 0.0) * 1000, 1) for span in spans],
+            'self ms': [round(seconds * 1000, 1) for seconds in self_seconds],
+        }), hide_index=True)
+
+        for name, stats in cache_stats.items():
+            lookups = stats['hits'] + stats['misses']
+            rate = f"{stats['hits'] / lookups:.0%}" if lookups else "-"
+            st.write(f"{name} cache: {rate} hits ({stats['hits']}/{lookups})")
+
+        memory = process_memory()
+        if memory['rss_bytes'] is not None:
+            st.write(f"Memory: {memory['rss_bytes'] / 2**20:.0f} MiB (peak {memory['peak_rss_bytes'] / 2**20:.0f} MiB)")
@@ -1,33 +1,130 @@
+import argparse
+from typing import Callable
 import pandas as pd
-import pickle as pkl
 import data_utils.scrape_data as scrape
 import data_utils.preprocess as preprocess
+import data_utils.snapshot as snapshot
+import data_utils.geometry as geometry
+import data_utils.schema as schema
+import data_utils.refresh as refresh
+from data_utils.pipeline import Stage, run_pipeline
 
-def main() -> dict[str, pd.DataFrame]:
-    all_dataframes = {}
-    
-    sales_data = scrape.scrape_sales_data()
-    cleaned_sales_data = preprocess.preprocess_EV_sales(sales_data)
-    all_dataframes['EV sales'] = cleaned_sales_data
+EMISSIONS_RAW_PATH = "data/reduced_energyc1.csv"
+EMISSIONS_CLEANED_PATH = "data/cleaned_energyc1.csv"
+NOC_RAW_PATH = "data/scraped_NoC_data.csv"
+EV_PRICES_PATH = "data/EV_cars.csv"
+
+def scrape_sales() -> pd.DataFrame:
+    return scrape.scrape_sales_data()
 
-    emissions_data = pd.read_csv("data/reduced_energyc1.csv")
-    cleaned_emissions_data = preprocess.preprocess_emissions_data(emissions_data)
-    all_dataframes["Fossil fuel emissions by cars"] = cleaned_emissions_data
+def prepare_emissions() -> pd.DataFrame:
+    # Streamed in chunks, the raw per-vehicle file does not fit in memory
+    _, counts = preprocess.stream_emissions_data(EMISSIONS_RAW_PATH, EMISSIONS_CLEANED_PATH)
+    return preprocess.emissions_cube(counts)
 
-    noc_data = pd.read_csv('data/scraped_NoC_data.csv', header=1)
-    cleaned_noc_data = preprocess.preprocess_EV_infrastructure(noc_data)
-    all_dataframes['EV infrastructure'] = cleaned_noc_data
+def prepare_infrastructure() -> pd.DataFrame:
+    noc_data = pd.read_csv(NOC_RAW_PATH, header=1)
+    return preprocess.preprocess_EV_infrastructure(noc_data)
 
+def prepare_em_and_sales() -> pd.DataFrame:
     # placeholder df (see readme)
-    all_dataframes['EV Emissions and sales'] = pd.DataFrame()
+    return pd.DataFrame()
+
+def prepare_prices() -> pd.DataFrame:
+    ev_prices = pd.read_csv(EV_PRICES_PATH)
+    return preprocess.preprocess_EV_prices(ev_prices)
+
+# Modules holding the preprocessing logic of the stages, part of their cache keys
+PREPROCESSING_CODE = ['data_utils.preprocess', 'data_utils.schema']
+
+# Stages of the preparation; the scrape always runs (it is served by the HTTP cache)
+# and the other stages re-run only when their code, files or inputs change
+STAGES = [
+    Stage('EV sales raw', scrape_sales, cacheable=False),
+    Stage('EV sales', preprocess.preprocess_EV_sales, inputs=['EV sales raw'], code=PREPROCESSING_CODE),
+    Stage('Fossil fuel emissions by cars', prepare_emissions, files=[EMISSIONS_RAW_PATH], code=PREPROCESSING_CODE),
+    Stage('EV infrastructure', prepare_infrastructure, files=[NOC_RAW_PATH], code=PREPROCESSING_CODE),
+    Stage('EV Emissions and sales', prepare_em_and_sales, code=PREPROCESSING_CODE),
+    Stage('EV prices', prepare_prices, files=[EV_PRICES_PATH], code=PREPROCESSING_CODE),
+    Stage('EV prices summary', preprocess.summarize_EV_prices, inputs=['EV prices'], code=PREPROCESSING_CODE),
+]
+
+# Stage outputs published as dashboard tables
+TABLES = ['EV sales', 'Fossil fuel emissions by cars', 'EV infrastructure', 'EV Emissions and sales', 'EV prices', 'EV prices summary']
+
+def run(max_workers: int = None, force: bool = False) -> dict:
+    """
+    Run the preparation pipeline and publish its tables as a snapshot.
+
+    Parameters:
+    max_workers (int): Number of worker processes for independent stages.
+    force (bool): Ignore the stage cache and run every stage.
+
+    Returns:
+    dict[str, StageResult]: Result of every stage, including whether it was a cache hit.
+    """
+    results = run_pipeline(STAGES, max_workers=max_workers, force=force)
+
+    snapshot.write_snapshot({name: results[name].output for name in TABLES})
+    refresh.record_period('sales', max(results['EV sales'].output.columns))
 
-    ev_prices = pd.read_csv('data/EV_cars.csv')
-    ev_prices_processed = preprocess.preprocess_EV_prices(ev_prices)
-    all_dataframes['EV prices'] = ev_prices_processed
+    # Simplified map geometries for the infrastructure choropleth
+    geometry.build_geometry_cache()
+
+    return results
+
+def run_incremental(load: Callable[[str, pd.DataFrame, pd.Index | None], None] = None) -> dict:
+    """
+    Refresh the EV sales table with only the periods published since the last run.
+
+    The last ingested period is requested again, as Eurostat revises recent figures.
+    Falls back to a full run if nothing was ingested yet.
+
+    Parameters:
+    load (Callable): Called with the table name, the merged table and its changed rows (None if
+    its columns changed) before the snapshot is published, e.g. to update the database.
+
+    Returns:
+    dict: Fetched periods, number of changed rows and the published snapshot version.
+    """
+    since = refresh.last_period('sales')
+    if since is None or snapshot.current_version() is None:
+        results = run()
+        if load is not None:
+            load('EVsales', results['EV sales'].output, None)
+        return {'periods': list(results['EV sales'].output.columns), 'rows': None, 'version': snapshot.current_version()}
+
+    stored = snapshot.read_table('EV sales')
+    delta = scrape.scrape_sales_data(since_period=since)
+    merged = preprocess.preprocess_EV_sales(refresh.merge_periods(stored, delta))
+    changed = refresh.changed_rows(stored, merged)
+
+    version = snapshot.current_version()
+    if changed is None or len(changed):
+        if load is not None:
+            load('EVsales', merged, changed)
+        version = snapshot.update_snapshot({'EV sales': merged})
+    refresh.record_period('sales', max(merged.columns))
+
+    return {'periods': list(delta.columns), 'rows': len(merged) if changed is None else len(changed), 'version': version}
+
+def main() -> dict[str, pd.DataFrame]:
+    results = run()
 
-    pkl.dump(all_dataframes, open("data/temp_export.pkl", "wb"))
+    return {name: results[name].output for name in TABLES}
 
-    return all_dataframes
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepare the dashboard data.")
+    parser.add_argument("--force", action="store_true", help="ignore the stage cache and run every stage")
+    parser.add_argument("--jobs", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--incremental", action="store_true", help="fetch only the sales periods published since the last run")
+    args = parser.parse_args()
 
+    if args.incremental:
+        print(run_incremental())
+    else:
+        results = run(max_workers=args.jobs, force=args.force)
+        for result in results.values():
+            print(f"{result.name:<32} {result.status:<4} {result.seconds:8.2f}s")
 
-   
+        print(schema.memory_report({name: results[name].output for name in TABLES}))
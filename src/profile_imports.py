@@ -0,0 +1,113 @@
+import argparse
+import re
+import subprocess
+import sys
+
+# Modules whose import cost is tracked: the modules shared by all pages and every page
+MODULES = [
+    "data_utils.data_access",
+    "data_utils.chart_cache",
+    "st_pages.home",
+    "st_pages.EV_Infrastructure",
+    "st_pages.EVSales",
+    "st_pages.emissions",
+    "st_pages.EV_Prices_DE",
+    "st_pages.EV_em_and_sales",
+]
+
+# Libraries that should only be imported by the code paths that use them (streamlit
+# itself imports the lazy plotly.graph_objects stub, so only plotly.express is tracked)
+HEAVY_PACKAGES = ["geopandas", "shapely", "plotly.express", "pyecharts", "streamlit_echarts", "sklearn", "requests", "sqlalchemy"]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+def import_times(module: str) -> list[tuple[str, int, int, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime and parse the report.
+
+    Parameters:
+    module (str): Name of the module to import.
+
+    Returns:
+    list[tuple]: Imported package, its own and cumulative import time in microseconds and its nesting depth.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+
+    times = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            times.append((package, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+
+    return times
+
+def profile(modules: list[str] = MODULES, top: int = 5) -> dict[str, dict]:
+    """
+    Profile the import time of modules, each in a fresh interpreter.
+
+    Parameters:
+    modules (list[str]): Names of the modules to import.
+    top (int): Number of slowest top-level dependencies reported per module.
+
+    Returns:
+    dict[str, dict]: Dictionary where keys are module names and values hold the total import time (ms,
+    None if the report has no line for the module, e.g. when it is imported at interpreter startup),
+    the slowest direct dependencies and the heavy packages that were imported.
+    """
+    report = {}
+    for module in modules:
+        times = import_times(module)
+
+        # Children are reported before their parent, one level deeper
+        total_us = None
+        children = []
+        for package, _, cumulative, depth in times:
+            if depth == 0 and package == module:
+                total_us = cumulative
+                break
+            if depth == 0:
+                children = []
+            elif depth == 1:
+                children.append((package, cumulative))
+        if total_us is None:
+            children = []
+        children.sort(key=lambda item: item[1], reverse=True)
+
+        imported = [package for package, _, _, _ in times]
+        heavy = [name for name in HEAVY_PACKAGES
+                 if any(package == name or package.startswith(name + '.') for package in imported)]
+
+        report[module] = {
+            'total_ms': None if total_us is None else total_us / 1000,
+            'slowest': [(package, cumulative / 1000) for package, cumulative in children[:top]],
+            'heavy': heavy,
+        }
+
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the import time of the dashboard modules (python -X importtime).")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="modules to profile")
+    parser.add_argument("--top", type=int, default=5, help="number of slowest dependencies shown per module")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a module takes longer to import")
+    args = parser.parse_args()
+
+    failed = []
+    missing = []
+    for module, entry in profile(args.modules, args.top).items():
+        if entry['total_ms'] is None:
+            print(f"{module:<32} no import time reported (not imported, or already imported at interpreter startup)")
+            missing.append(module)
+            continue
+        print(f"{module:<32} {entry['total_ms']:8.1f} ms  heavy: {', '.join(entry['heavy']) or '-'}")
+        for package, ms in entry['slowest']:
+            print(f"    {package:<28} {ms:8.1f} ms")
+        if args.max_ms is not None and entry['total_ms'] > args.max_ms:
+            failed.append(module)
+
+    if missing:
+        sys.exit(f"No import time reported for: {', '.join(missing)}")
+    if failed:
+        sys.exit(f"Import time above {args.max_ms} ms: {', '.join(failed)}")
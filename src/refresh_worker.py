@@ -0,0 +1,71 @@
+import argparse
+import os
+import time
+import traceback
+
+import load_db
+import data_utils.snapshot as snapshot
+
+# Seconds between two refreshes, and before retrying a failed one
+REFRESH_INTERVAL = int(os.environ.get('DSS_REFRESH_INTERVAL', 24 * 3600))
+RETRY_INTERVAL = int(os.environ.get('DSS_REFRESH_RETRY_INTERVAL', 15 * 60))
+
+# 'full' runs the (stage cached) preparation pipeline, 'incremental' fetches only new sales periods
+REFRESH_MODE = os.environ.get('DSS_REFRESH_MODE', 'full')
+
+# Load the refreshed tables into Postgres as well as publishing the snapshot
+LOAD_DB = os.environ.get('DSS_REFRESH_LOAD_DB', '1').lower() in ('1', 'true', 'yes')
+
+def refresh_once(mode: str = REFRESH_MODE, load: bool = LOAD_DB) -> str:
+    """
+    Rebuild the dashboard data once and publish it as a new snapshot version.
+
+    The snapshot is swapped atomically at the end, so the dashboard keeps serving the
+    last good version while the refresh runs or if it fails.
+
+    Parameters:
+    mode (str): 'full' or 'incremental' (see REFRESH_MODE).
+    load (bool): Load the refreshed tables into Postgres as well.
+
+    Returns:
+    str: Version of the published snapshot.
+    """
+    if load:
+        load_db.main(incremental=mode == 'incremental')
+    elif mode == 'incremental':
+        load_db.prep.run_incremental()
+    else:
+        load_db.prep.run()
+
+    return snapshot.current_version()
+
+def run_forever(interval: int = REFRESH_INTERVAL, retry_interval: int = RETRY_INTERVAL) -> None:
+    """
+    Refresh the data on a fixed schedule, starting immediately.
+
+    Parameters:
+    interval (int): Seconds between the start of two successful refreshes.
+    retry_interval (int): Seconds to wait before retrying a failed refresh.
+    """
+    while True:
+        start = time.monotonic()
+        try:
+            version = refresh_once()
+            print(f"Refresh finished in {time.monotonic() - start:.1f}s, serving snapshot {version}", flush=True)
+            delay = interval
+        except Exception:
+            traceback.print_exc()
+            print(f"Refresh failed, still serving snapshot {snapshot.current_version()}", flush=True)
+            delay = retry_interval
+
+        time.sleep(max(0.0, delay - (time.monotonic() - start)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the dashboard data in the background.")
+    parser.add_argument("--once", action="store_true", help="refresh once and exit")
+    args = parser.parse_args()
+
+    if args.once:
+        print(refresh_once())
+    else:
+        run_forever()
@@ -1,28 +1,30 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
-import plotly.express as px
 import numpy as np
+import data_utils.chart_cache as chart_cache
+import data_utils.data_access as data_access
+from data_utils.geometry import DETAIL_LEVELS, DEFAULT_DETAIL
 
-import geopandas as gpd
-
-def main(df: pd.DataFrame) -> None:
+def main() -> None:
    col = st.columns((8, 2), gap='small')
-   df = pd.read_csv("data/cleaned_NoC_data.csv")
-    
+   df = data_access.get_csv(data_access.NOC_CSV_PATH)
+   data_version = str(data_access.file_version(data_access.NOC_CSV_PATH))
+
    is_scale_values = col[1].checkbox("Scale logarithmically", value=False)
-   df_1 = df.copy()
+   map_detail = col[1].selectbox("Map detail", list(DETAIL_LEVELS), index=list(DETAIL_LEVELS).index(DEFAULT_DETAIL))
 
-   if is_scale_values:
-    df_1['Recharging Points'] = np.log10(df['Recharging Points'])
-    df_1['Power per station (kW)'] = np.log10(df['Power per station (kW)'])
+   def build_bubble_chart_1():
+        df_1 = df.copy()
+
+        if is_scale_values:
+            df_1['Recharging Points'] = np.log10(df['Recharging Points'])
+            df_1['Power per station (kW)'] = np.log10(df['Power per station (kW)'])
 
-   with col[0]:
         bubble_chart_1 = alt.Chart(df_1).mark_circle().encode(
             x='Recharging Points',
             y='Power per station (kW)',
-            size=alt.Size('Total Recharging Power Output (kW)', scale=alt.Scale(range=[60, 1300]), legend=None),  
-            color=alt.Color('Country', legend=None), 
+            size=alt.Size('Total Recharging Power Output (kW)', scale=alt.Scale(range=[60, 1300]), legend=None),
+            color=alt.Color('Country', legend=None),
             tooltip=['Country', 'Recharging Points', 'Power per station (kW)', 'Total Recharging Power Output (kW)']
         ).properties(
             title='Recharging Points vs. Power per Station by Country',
@@ -44,16 +46,14 @@ def main(df: pd.DataFrame) -> None:
         )
 
         # Combine the bubble chart and text labels
-        final_chart_1 = bubble_chart_1 + text_labels_1
-        
-        st.altair_chart(final_chart_1)
-        
-      
+        return bubble_chart_1 + text_labels_1
+
+   def build_bubble_chart_2():
         bubble_chart_2 = alt.Chart(df).mark_circle().encode(
             x='Power per station (kW)',
             y='Power available per fleet',
-            size=alt.Size('Total Recharging Power Output (kW)', scale=alt.Scale(range=[60, 1300]), legend=None),  
-            color=alt.Color('Country', legend=None), 
+            size=alt.Size('Total Recharging Power Output (kW)', scale=alt.Scale(range=[60, 1300]), legend=None),
+            color=alt.Color('Country', legend=None),
             tooltip=['Country', 'Recharging Points', 'Power per station (kW)', 'Total Recharging Power Output (kW)']
         ).properties(
             title='EV recharging power distribution among european countries',
@@ -61,31 +61,26 @@ def main(df: pd.DataFrame) -> None:
             height=650,
         ).interactive()
 
-       
-
         text_labels_2 = alt.Chart(df).mark_text(
             align='center',
             baseline='top',
             dy=15,
-            color='white'  
+            color='white'
         ).encode(
             x='Power per station (kW)',
             y='Power available per fleet',
             text='Country'
         )
-        final_chart_2 = bubble_chart_2 + text_labels_2
-        
-        st.altair_chart(final_chart_2)
-        st.write("<h1 style='font-size: 25px;'>Interactive chloropleth map of charging stations in europe</h1>", unsafe_allow_html=True)
-        
-        geo_df = gpd.read_file("data/geodata/europe.geojson")
-       
-        
-        merged = geo_df.set_index('NAME').join(df.set_index('Country'))
-        merged = merged.dropna()
-        
+        return bubble_chart_2 + text_labels_2
+
+   def build_choropleth():
+        import plotly.express as px
+
+        # Simplified geometries, already joined to the charging data
+        merged, geojson = data_access.get_choropleth_data(map_detail)
+
         fig = px.choropleth(merged,
-                            geojson=merged.geometry,
+                            geojson=geojson,
                             locations=merged.index,
                             color='Recharging Points',
                             projection="natural earth",
@@ -93,8 +88,19 @@ def main(df: pd.DataFrame) -> None:
                             height=800,
                             color_continuous_scale="Viridis",
                             )
-       
-        
+
         fig.update_geos(fitbounds="locations", visible=False, bgcolor="#8b8b8b")
-        st.plotly_chart(fig, use_container_width=True)
-        
+        return fig
+
+   with col[0]:
+        key = chart_cache.make_key("EV_Infrastructure", "bubble_1", data_version, log_scale=is_scale_values)
+        chart_cache.altair_chart(key, build_bubble_chart_1)
+
+        key = chart_cache.make_key("EV_Infrastructure", "bubble_2", data_version)
+        chart_cache.altair_chart(key, build_bubble_chart_2)
+
+        st.write("<h1 style='font-size: 25px;'>Interactive chloropleth map of charging stations in europe</h1>", unsafe_allow_html=True)
+
+        geo_version = f"{data_version}-{data_access.file_version(data_access.GEODATA_PATH)}"
+        key = chart_cache.make_key("EV_Infrastructure", "choropleth", geo_version, detail=map_detail)
+        chart_cache.plotly_chart(key, build_choropleth, use_container_width=True)
@@ -1,8 +1,21 @@
 import pandas as pd
 import altair as alt
 import streamlit as st
+import data_utils.chart_cache as chart_cache
+import data_utils.data_access as data_access
+from data_utils.schema import PRICE_CATEGORIES
+
+# Statistics of Range, Efficiency and Fast_charge per price category, see preprocess.summarize_EV_prices
+TABLE_NAME = "EVpricessummary"
+
+def _summary(attribute: str) -> pd.DataFrame:
+    # One row per price category, with the mean also available under the attribute's name
+    df = data_access.get_table(TABLE_NAME, where={'attribute': attribute})
+    return df.assign(**{attribute: df['mean']})
+
+def main() -> None:
+    data_version = data_access.data_version(TABLE_NAME)
 
-def main(df: pd.DataFrame) -> None:
     # Title and Dropdown Menus for Chart Selection
     st.title('Electric Vehicle Data Visualizations')
     
@@ -12,37 +25,49 @@ def main(df: pd.DataFrame) -> None:
         'Price Categories vs Efficiency',
         'Price Categories vs Fast-Charging Time'
     ])
+    key = chart_cache.make_key("EV_Prices_DE", price_category_option, data_version)
 
 # Display the selected price category chart
 
     #Price Categories vs. Range
     if price_category_option == 'Price Categories vs Range':
         st.subheader('Price Categories vs. Range')
-        boxplot = alt.Chart(df).mark_boxplot().encode(
-            x=alt.X('Price_category', title='Price Category (EUR)'),
-            y=alt.Y('Range:Q', title='Range (km)'),
-            color='Price_category'
-        ).properties(width=600, height=400).interactive()
-        st.altair_chart(boxplot)
+
+        def build_boxplot():
+            # Drawn from the precomputed statistics instead of shipping every car to the browser
+            base = alt.Chart(_summary('Range')).encode(
+                x=alt.X('Price_category:O', title='Price Category (EUR)', sort=PRICE_CATEGORIES),
+                color=alt.Color('Price_category:O', sort=PRICE_CATEGORIES),
+                tooltip=['Price_category:O', 'count:Q', alt.Tooltip('mean:Q', format='.0f'),
+                         'lower_whisker:Q', 'q1:Q', 'median:Q', 'q3:Q', 'upper_whisker:Q']
+            )
+            whiskers = base.mark_rule().encode(y=alt.Y('lower_whisker:Q', title='Range (km)'), y2='upper_whisker:Q')
+            boxes = base.mark_bar(size=20).encode(y='q1:Q', y2='q3:Q')
+            medians = base.mark_tick(color='white', size=20).encode(y='median:Q')
+
+            return alt.layer(whiskers, boxes, medians).properties(width=600, height=400).interactive()
+        chart_cache.altair_chart(key, build_boxplot)
 
     #Price Categories vs. Efficiency
     elif price_category_option == 'Price Categories vs Efficiency':
         st.subheader('Price Categories vs. Efficiency')
-        efficiency_by_price = df.groupby('Price_category')['Efficiency'].mean().reset_index()
-        efficiency_bar = alt.Chart(efficiency_by_price).mark_bar().encode(
-            x=alt.X('Efficiency:Q', title='Average Efficiency (Wh/km)'),
-            y=alt.Y('Price_category', title='Price Range (EUR)'),
-            color=alt.Color('Efficiency:Q', scale=alt.Scale(scheme='blues'))
-        ).properties(width=600, height=400).interactive()
-        st.altair_chart(efficiency_bar)
+
+        def build_efficiency_bar():
+            return alt.Chart(_summary('Efficiency')).mark_bar().encode(
+                x=alt.X('Efficiency:Q', title='Average Efficiency (Wh/km)'),
+                y=alt.Y('Price_category:O', title='Price Range (EUR)', sort=PRICE_CATEGORIES),
+                color=alt.Color('Efficiency:Q', scale=alt.Scale(scheme='blues'))
+            ).properties(width=600, height=400).interactive()
+        chart_cache.altair_chart(key, build_efficiency_bar)
 
     #Price Categories vs. Fast-Charging Time
     elif price_category_option == 'Price Categories vs Fast-Charging Time':
         st.subheader('Price Categories vs. Fast-Charging Time')
-        avg_fast_charge = df.groupby('Price_category')['Fast_charge'].mean().reset_index()
-        fast_charge_bar = alt.Chart(avg_fast_charge).mark_bar().encode(
-            x=alt.X('Price_category', title='Price Category (EUR)'),
-            y=alt.Y('Fast_charge:Q', title='Fast-Charging Time (minutes)'),
-            color=alt.Color('Fast_charge:Q', scale=alt.Scale(scheme='blues'))
-        ).properties(width=600, height=400).interactive()
-        st.altair_chart(fast_charge_bar)
+
+        def build_fast_charge_bar():
+            return alt.Chart(_summary('Fast_charge')).mark_bar().encode(
+                x=alt.X('Price_category:O', title='Price Category (EUR)', sort=PRICE_CATEGORIES),
+                y=alt.Y('Fast_charge:Q', title='Fast-Charging Time (minutes)'),
+                color=alt.Color('Fast_charge:Q', scale=alt.Scale(scheme='blues'))
+            ).properties(width=600, height=400).interactive()
+        chart_cache.altair_chart(key, build_fast_charge_bar)
@@ -2,23 +2,22 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+import data_utils.chart_cache as chart_cache
+import data_utils.data_access as data_access
 
+TABLE_NAME = "EVEmissionsandsales"
 
-def main(df_em: pd.DataFrame) -> None:
+# Tables up to this many rows are filtered in the browser (one spec with a Vega dropdown),
+# larger ones on the server, sending only the selected country's series
+CLIENT_SIDE_MAX_ROWS = 100
 
-    # Exploring the trend of emissions over the years for each country
-    # Bar plots
-    
-    lst = df_em['Country'].unique()
-    input_dropdown = alt.binding_select(options=lst, name='Country ')
-    selection = alt.selection_point(fields=['Country'], bind=input_dropdown, value = 'Austria')
+DEFAULT_COUNTRY = 'Austria'
 
-    # A peculiar trend was shown around the year 2018 for each country that had data from before and after 2018. When analysing the metadata, it appeared a new 
+def _build_chart(df_em: pd.DataFrame, selection=None) -> alt.LayerChart:
+    # A peculiar trend was shown around the year 2018 for each country that had data from before and after 2018. When analysing the metadata, it appeared a new
     # measuring system was used such that only the years 2000-2016 are comparable with each other and the years 2017 and up are comparable with each other.
     # To obtain reliable insights regarding the trend, later on the data will be split for these two time periods.
 
-
-        
     # Chart depicting relationship between emissions and number of new EVs over the years for period 2017 and up
     base2 = alt.Chart(df_em).encode(
         alt.X('Year:O').title('Year'))
@@ -27,41 +26,60 @@ def main(df_em: pd.DataFrame) -> None:
         alt.Y('Emissions:Q').title('Emissions'),
         tooltip=['Year', 'Emissions'],
         color=alt.value('#93a8cc')
-    ).add_params(
-        selection
-    ).transform_filter(
-        selection
     ).properties(
         title=(f'Average C02 emissions per km from new passenger cars for selected country'),
         width=500,
         height=550
-    )    
+    )
 
     line_chart2 = base2.mark_line(stroke='#203864', interpolate='monotone').encode(
         alt.Y('Nr_of_new_EVs').title('Nr of new EVs'),
         tooltip=['Year', 'Nr_of_new_EVs']
-    ).add_params(
-        selection
-    ).transform_filter(
-        selection
     ).properties(
         width=500,
         height=550
-    )    
-            
+    )
+
+    # Client-side mode: the dropdown selection filters the embedded data in the browser
+    if selection is not None:
+        bar_chart3 = bar_chart3.add_params(selection).transform_filter(selection)
+        line_chart2 = line_chart2.add_params(selection).transform_filter(selection)
+
     full_chart_17_up = alt.layer(bar_chart3, line_chart2).resolve_scale(
         y='independent'
     ).configure(background='#FFFFFF'
     ).configure_axis(
-    labelColor='#000000', 
-    titleColor='#000000'   
+    labelColor='#000000',
+    titleColor='#000000'
     ).configure_title(
-    color='#000000' 
+    color='#000000'
     )
-            
-    full_chart_17_up
-        
-    st.altair_chart(full_chart_17_up)
-    
-    
-    
+    return full_chart_17_up
+
+def main() -> None:
+    data_version = data_access.data_version(TABLE_NAME)
+
+    # Exploring the trend of emissions over the years for each country
+    # Bar plots
+    countries = data_access.get_table(TABLE_NAME, columns=['Country'])['Country']
+    lst = countries.unique().tolist()
+
+    if len(countries) <= CLIENT_SIDE_MAX_ROWS:
+        def build_client_side_chart():
+            df_em = data_access.get_table(TABLE_NAME, columns=['Country', 'Year', 'Emissions', 'Nr_of_new_EVs'])
+            input_dropdown = alt.binding_select(options=lst, name='Country ')
+            selection = alt.selection_point(fields=['Country'], bind=input_dropdown, value=DEFAULT_COUNTRY)
+            return _build_chart(df_em, selection)
+
+        chart_cache.altair_chart(chart_cache.make_key("EV_em_and_sales", "emissions_and_sales", data_version), build_client_side_chart)
+        return
+
+    # Server-side mode: the spec of every country is built once and only its series is sent
+    country = st.selectbox('Country', lst, index=lst.index(DEFAULT_COUNTRY) if DEFAULT_COUNTRY in lst else 0)
+
+    def build_country_chart():
+        df_em = data_access.get_table(TABLE_NAME, columns=['Year', 'Emissions', 'Nr_of_new_EVs'], where={'Country': [country]})
+        return _build_chart(df_em)
+
+    key = chart_cache.make_key("EV_em_and_sales", "emissions_and_sales", data_version, country=country)
+    chart_cache.altair_chart(key, build_country_chart)
@@ -1,6 +1,7 @@
 #!/bin/sh
 
-python load_db.py &&
+# Data is (re)built in the background; the dashboard serves the last published snapshot
+python refresh_worker.py &
 
 echo -e "Application is starting..."
 echo -e "\e[1;31m WARNING:  \e[0m Access the app at:  http://localhost:8501/ OR other URL specified"
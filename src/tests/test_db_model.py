@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import data_utils.db_model as db_model
+import load_db
+
+def _tables(countries: list[str], new_cars: list[list[float]]) -> dict[str, pd.DataFrame]:
+    sales = pd.DataFrame(new_cars, index=countries, columns=['2022', '2023'])
+    infrastructure = pd.DataFrame({
+        'Country': countries,
+        'Power per station (kW)': [22.5] * len(countries),
+        'Power available per fleet': [1.5] * len(countries),
+        'Total Recharging Power Output (kW)': [1000] * len(countries),
+        'Recharging Points': [100 * (i + 1) for i in range(len(countries))],
+        'Light Duty PEV Fleet': [5000] * len(countries),
+    })
+    return {'EV sales': sales, 'EV infrastructure': infrastructure}
+
+def _rows(connection, name: str) -> list[tuple]:
+    return [tuple(row) for row in connection.execute(text(f"SELECT * FROM {name} ORDER BY 1, 2"))]
+
+def test_normalize_drops_rows_without_key():
+    tables = _tables(['Austria', np.nan], [[10, 11], [20, 21]])
+    tables['EV sales'].loc['Austria', '2023'] = np.nan
+
+    normalized = db_model.normalize(tables)
+
+    assert normalized['ev_sales'].values.tolist() == [['Austria', 2022, 10.0]]
+    assert normalized['ev_charging']['country'].tolist() == ['Austria']
+
+def test_load_normalized_tables(pg_connection):
+    # First load creates the tables and views
+    with pg_connection.begin():
+        load_db.load_normalized_tables(pg_connection, _tables(['Austria', 'Belgium'], [[10, 11], [20, 25]]))
+
+    assert _rows(pg_connection, 'mv_sales_per_country_year') == [
+        ('Austria', 2022, 10, None), ('Austria', 2023, 11, 1), ('Belgium', 2022, 20, None), ('Belgium', 2023, 25, 5),
+    ]
+    assert [row[0] for row in _rows(pg_connection, 'mv_charging_stats')] == ['Austria', 'Belgium']
+    pg_connection.rollback()
+
+    # Second load: a changed value, a country that vanished and one without a name
+    with pg_connection.begin():
+        load_db.load_normalized_tables(pg_connection, _tables(['Belgium', np.nan], [[20, 30], [1, 2]]))
+
+    assert _rows(pg_connection, 'ev_sales') == [('Belgium', 2022, 20), ('Belgium', 2023, 30)]
+    assert _rows(pg_connection, 'mv_sales_per_country_year') == [('Belgium', 2022, 20, None), ('Belgium', 2023, 30, 10)]
+    assert [row[0] for row in _rows(pg_connection, 'ev_charging')] == ['Belgium']
+    assert [row[0] for row in _rows(pg_connection, 'mv_charging_stats')] == ['Belgium']
+    pg_connection.rollback()
+
+    # A source table that became empty empties its normalized table
+    tables = _tables(['Belgium'], [[20, 30]])
+    tables['EV sales'] = tables['EV sales'].iloc[:0]
+    with pg_connection.begin():
+        load_db.load_normalized_tables(pg_connection, tables)
+
+    assert _rows(pg_connection, 'mv_sales_per_country_year') == []
+
+def test_views_readable_during_refresh(pg_engine):
+    with pg_engine.begin() as connection:
+        load_db.load_normalized_tables(connection, _tables(['Austria'], [[10, 11]]))
+
+    with pg_engine.connect() as writer, pg_engine.connect() as reader:
+        reader.execute(text("SET lock_timeout = '2s'"))
+        with writer.begin():
+            load_db.load_normalized_tables(writer, _tables(['Austria'], [[10, 15]]))
+
+            # The concurrent refresh does not block readers, which see the committed rows
+            assert _rows(reader, 'mv_sales_per_country_year') == [('Austria', 2022, 10, None), ('Austria', 2023, 11, 1)]
+            reader.rollback()
+
+        assert _rows(reader, 'mv_sales_per_country_year') == [('Austria', 2022, 10, None), ('Austria', 2023, 15, 5)]
+
+def test_table_of_older_schema_is_migrated(pg_connection):
+    # ev_sales and a view on it as created by an older version, without new_cars
+    with pg_connection.begin():
+        pg_connection.execute(text("CREATE TABLE ev_sales (country text, year integer, cars integer, PRIMARY KEY (country, year))"))
+        pg_connection.execute(text("INSERT INTO ev_sales VALUES ('Austria', 2022, 1)"))
+        pg_connection.execute(text("CREATE MATERIALIZED VIEW mv_sales_per_country_year AS SELECT country, year FROM ev_sales"))
+
+    with pg_connection.begin():
+        load_db.load_normalized_tables(pg_connection, _tables(['Belgium'], [[20, 30]]))
+
+    assert _rows(pg_connection, 'ev_sales') == [('Belgium', 2022, 20), ('Belgium', 2023, 30)]
+    assert _rows(pg_connection, 'mv_sales_per_country_year') == [('Belgium', 2022, 20, None), ('Belgium', 2023, 30, 10)]
+
+def test_swap_of_normalized_table_is_refused(pg_connection):
+    with pg_connection.begin():
+        db_model.create_schema(pg_connection)
+        rows = db_model.normalize(_tables(['Austria'], [[10, 11]]))['ev_sales'].drop(columns='new_cars')
+        with pytest.raises(ValueError, match='create_schema'):
+            load_db.load_table_to_db(pg_connection, 'ev_sales', rows)
@@ -0,0 +1,71 @@
+import gzip
+import time
+
+import numpy as np
+import pytest
+import requests
+
+import data_utils.fetch as fetch
+import data_utils.http_cache as http_cache
+import data_utils.scrape_data as scrape
+
+def _assert_sales(df):
+    assert df.index.tolist() == ['Bulgaria', 'Germany', 'Greece']
+    assert df.columns.tolist() == ['2022', '2023']
+    np.testing.assert_array_equal(df.to_numpy(), [[1234, 2108], [22013, 32151], [np.nan, 7431]])
+
+def test_gzip_response(stub, payload):
+    stub.responses = [(200, {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}, gzip.compress(payload), 0)]
+
+    response = fetch.fetch(stub.url, session=fetch.create_session())
+
+    assert 'gzip' in stub.requests[0]['Accept-Encoding']
+    assert response.status == 'downloaded'
+    assert response.body == payload
+    _assert_sales(scrape.scrape_sales_data(response))
+
+def test_retry_with_backoff(stub, payload):
+    stub.responses = [
+        (503, {}, b'', 0),
+        (429, {'Retry-After': '0'}, b'', 0),
+        (502, {}, b'', 0),
+        (200, {'Content-Type': 'application/json'}, payload, 0),
+    ]
+
+    response = fetch.fetch(stub.url, session=fetch.create_session())
+
+    assert len(stub.requests) == 4
+    _assert_sales(scrape.scrape_sales_data(response))
+
+    # Exponential backoff between consecutive failures (the first retry is immediate)
+    gaps = np.diff(stub.request_times)
+    assert gaps[1] >= 0.2 * 0.9
+    assert gaps[2] >= 0.4 * 0.9
+
+def test_retries_exhausted(stub):
+    stub.responses = [(503, {}, b'', 0)]
+
+    with pytest.raises(requests.RequestException):
+        fetch.fetch(stub.url, session=fetch.create_session())
+
+    assert len(stub.requests) == fetch.MAX_RETRIES + 1
+
+def test_timeout(stub, payload):
+    stub.responses = [(200, {'Content-Type': 'application/json'}, payload, 1.0)]
+
+    start = time.monotonic()
+    with pytest.raises(requests.RequestException):
+        fetch.fetch(stub.url, timeout=(1, 0.1), session=fetch.create_session(max_retries=0))
+
+    assert time.monotonic() - start < 0.9
+
+def test_timeout_serves_stale_copy(stub, payload):
+    stub.responses = [(200, {'Content-Type': 'application/json'}, payload, 0)]
+    fetch.fetch(stub.url, session=fetch.create_session())
+
+    # The cached copy has expired, and the server no longer answers in time
+    stub.responses = [(200, {'Content-Type': 'application/json'}, payload, 1.0)]
+    response = http_cache.cached_get(stub.url, fetch.create_session(max_retries=0), timeout=(1, 0.1), max_age=0)
+
+    assert response.status == 'stale'
+    assert response.body == payload
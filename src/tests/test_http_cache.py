@@ -0,0 +1,107 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import data_utils.fetch as fetch
+import data_utils.http_cache as http_cache
+import data_utils.scrape_data as scrape
+
+JSON = {'Content-Type': 'application/json'}
+
+def _get(url: str, **kwargs) -> http_cache.CachedResponse:
+    return http_cache.cached_get(url, fetch.create_session(max_retries=0), timeout=(1, 1), **kwargs)
+
+def _keys(cache_dir) -> set[str]:
+    return {name.split('.', 1)[0] for name in os.listdir(cache_dir)}
+
+def test_fresh_hit(stub, payload):
+    stub.responses = [(200, JSON, payload, 0)]
+
+    assert _get(stub.url).status == 'downloaded'
+    response = _get(stub.url)
+
+    assert response.status == 'fresh'
+    assert response.body == payload
+    assert len(stub.requests) == 1
+
+def test_revalidation_skips_decoding(stub, payload, monkeypatch):
+    stub.responses = [(200, {**JSON, 'ETag': '"v1"'}, payload, 0), (304, {'ETag': '"v1"'}, b'', 0)]
+    expected = scrape.decode_response(_get(stub.url))
+
+    def decode_jsonstat(data):
+        raise AssertionError("the decoded copy should have been reused")
+    monkeypatch.setattr(scrape, 'decode_jsonstat', decode_jsonstat)
+
+    response = _get(stub.url, max_age=0)
+    array, labels = scrape.decode_response(response)
+
+    assert response.status == 'revalidated'
+    assert stub.requests[1]['If-None-Match'] == '"v1"'
+    assert response.body == payload
+    assert labels == expected[1]
+    np.testing.assert_array_equal(array, expected[0])
+
+def test_stale_on_error(stub, payload):
+    stub.responses = [(200, JSON, payload, 0), (503, {}, b'', 0)]
+    _get(stub.url)
+
+    response = _get(stub.url, max_age=0)
+
+    assert response.status == 'stale'
+    assert response.body == payload
+
+def test_offline(stub, payload):
+    stub.responses = [(200, JSON, payload, 0)]
+
+    with pytest.raises(FileNotFoundError):
+        _get(stub.url, offline=True)
+    _get(stub.url)
+    response = _get(stub.url, offline=True)
+
+    assert response.status == 'offline'
+    assert response.body == payload
+    assert len(stub.requests) == 1
+
+def test_eviction_order(stub, payload, tmp_path):
+    stub.responses = [(200, JSON, payload, 0)]
+    urls = {name: f"{stub.url}&entry={name}" for name in ('a', 'b', 'c')}
+    keys = {name: _get(url).key for name, url in urls.items()}
+
+    # Downloaded in the order a, b, c; a is used again afterwards
+    now = time.time()
+    for age, name in zip((30, 20, 10), ('a', 'b', 'c')):
+        os.utime(http_cache.artifact_path(keys[name], 'json'), (now - age, now - age))
+    assert _get(urls['a']).status == 'fresh'
+
+    # Room for two of the entries (their sizes differ by a few bytes of metadata)
+    sizes = {name: sum(os.path.getsize(tmp_path / file_name) for file_name in os.listdir(tmp_path) if file_name.startswith(key))
+             for name, key in keys.items()}
+    http_cache.evict(max_bytes=sizes['a'] + sizes['c'])
+
+    assert _keys(tmp_path) == {keys['a'], keys['c']}
+
+def test_eviction_keeps_current_entry(stub, payload, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'MAX_BYTES', 1)
+    stub.responses = [(200, JSON, payload, 0)]
+
+    first = _get(f"{stub.url}&entry=a")
+    scrape.decode_response(first)
+    assert _keys(tmp_path) == {first.key}
+
+    # The next download and its decoded copy evict the older entry
+    second = _get(f"{stub.url}&entry=b")
+    scrape.decode_response(second)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{second.key}.{suffix}" for suffix in ('body', 'json', 'decoded.npz'))
+
+def test_eviction_ignores_removed_files(stub, payload, tmp_path, monkeypatch):
+    stub.responses = [(200, JSON, payload, 0)]
+    _get(stub.url)
+
+    # A file listed and then removed by a concurrent eviction
+    listdir = os.listdir
+    monkeypatch.setattr(http_cache.os, 'listdir', lambda path: listdir(path) + ['gone.body'])
+    http_cache.evict(max_bytes=0)
+
+    assert listdir(tmp_path) == []
@@ -0,0 +1,52 @@
+import pandas as pd
+from sqlalchemy import text
+
+import load_db
+
+def _infrastructure(points: list[int]) -> pd.DataFrame:
+    countries = ['Austria', 'Belgium', 'Croatia'][:len(points)]
+    return pd.DataFrame({'Country': countries, 'Recharging Points': points, 'Power per station (kW)': [22.0] * len(points)})
+
+def _sales() -> pd.DataFrame:
+    return pd.DataFrame({'2022': [10, 20, 30], '2023': [11, 21, 31]}, index=['Austria', 'Belgium', 'Croatia'])
+
+def _read(connection, table_name: str, order_by: str) -> pd.DataFrame:
+    return pd.read_sql_query(text(f'SELECT * FROM "{table_name}" ORDER BY "{order_by}"'), connection)
+
+def test_load_into_fresh_table_upserts_on_second_load(pg_connection):
+    with pg_connection.begin():
+        load_db.load_table_to_db(pg_connection, 'EVinfrastructure', _infrastructure([100, 200, 300]))
+        assert load_db._has_unique_key(pg_connection, 'EVinfrastructure', ['Country'])
+
+    # Changed value, and a country that disappeared from the source
+    with pg_connection.begin():
+        load_db.load_table_to_db(pg_connection, 'EVinfrastructure', _infrastructure([100, 250]))
+
+    df = _read(pg_connection, 'EVinfrastructure', 'Country')
+    assert df['Country'].tolist() == ['Austria', 'Belgium']
+    assert df['Recharging Points'].tolist() == [100, 250]
+
+def test_load_into_table_created_by_to_sql(pg_connection):
+    # Tables of older deployments were written by to_sql, without the unique index
+    with pg_connection.begin():
+        _infrastructure([100, 200, 300]).to_sql('EVinfrastructure', con=pg_connection, index=False)
+        assert not load_db._has_unique_key(pg_connection, 'EVinfrastructure', ['Country'])
+
+    with pg_connection.begin():
+        load_db.load_table_to_db(pg_connection, 'EVinfrastructure', _infrastructure([100, 250, 300]))
+        assert load_db._has_unique_key(pg_connection, 'EVinfrastructure', ['Country'])
+
+    assert _read(pg_connection, 'EVinfrastructure', 'Country')['Recharging Points'].tolist() == [100, 250, 300]
+
+def test_partial_load_into_table_created_by_to_sql(pg_connection):
+    with pg_connection.begin():
+        _sales().to_sql('EVsales', con=pg_connection, index=True, index_label='index')
+
+    changed = _sales().loc[['Belgium']] + 1
+    with pg_connection.begin():
+        load_db.load_table_to_db(pg_connection, 'EVsales', changed, partial=True)
+        assert load_db._has_unique_key(pg_connection, 'EVsales', ['index'])
+
+    df = _read(pg_connection, 'EVsales', 'index')
+    assert df['index'].tolist() == ['Austria', 'Belgium', 'Croatia']
+    assert df['2023'].tolist() == [11, 22, 31]
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import data_utils.chart_cache as chart_cache
+import data_utils.data_access as data_access
+import data_utils.geometry as geometry
+import data_utils.preprocess as preprocess
+from benchmarks import synthetic
+
+@pytest.fixture
+def infrastructure(tmp_path, monkeypatch):
+    # Austria and Belgium are in the map geometries, the synthetic third country is not
+    df = preprocess.preprocess_EV_infrastructure(synthetic.infrastructure(3))
+    path = tmp_path / 'noc.csv'
+    df.to_csv(path, index=False)
+
+    monkeypatch.setattr(data_access, 'NOC_CSV_PATH', str(path))
+    monkeypatch.setattr(geometry, 'GEOMETRY_CACHE_DIR', str(tmp_path / 'geometry'))
+    monkeypatch.setattr(chart_cache, '_cache', chart_cache.ChartCache())
+    return df
+
+def test_infrastructure_choropleth_has_traces_and_features(infrastructure):
+    from streamlit.testing.v1 import AppTest
+
+    script = "import importlib\nimportlib.import_module('st_pages.EV_Infrastructure').main()"
+    for run in ('cold', 'cached'):
+        at = AppTest.from_string(script, default_timeout=120).run()
+        assert not at.exception, run
+
+        charts = at.get('plotly_chart')
+        assert len(charts) == 1, run
+        spec = json.loads(charts[0].proto.spec)
+
+        trace = spec['data'][0]
+        assert trace['type'] == 'choropleth'
+        assert sorted(trace['locations']) == ['Austria', 'Belgium']
+        assert len(trace['geojson']['features']) == 2
+        assert all(feature['geometry']['coordinates'] for feature in trace['geojson']['features'])
+
+    assert chart_cache.stats()['hits'] >= 1
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_utils.preprocess as preprocess
+
+@pytest.fixture
+def vehicles():
+    # Groups of every size: large with outliers, one of a single repeated value, below
+    # OUTLIER_MIN_GROUP_ROWS and a single row
+    rng = np.random.default_rng(0)
+    sizes = {('AT', 2020): 400, ('AT', 2021): 250, ('BE', 2020): 60, ('BE', 2021): 12, ('CY', 2020): 1}
+    groups = []
+    for (country, year), size in sizes.items():
+        z = rng.normal(170, 30, size).round()
+        if size >= 250:
+            z[:5] = [20, 25, 400, 450, 600]
+        if size == 60:
+            z[:] = 150
+            z[0] = 300
+        groups.append(pd.DataFrame({'Country': country, 'year': year, 'z (Wh/km)': z}))
+
+    df = pd.concat(groups, ignore_index=True)
+    df.loc[df.sample(frac=0.02, random_state=0).index, 'z (Wh/km)'] = np.nan
+    df.insert(0, 'ID', np.arange(1, len(df) + 1))
+    return df.astype(preprocess.EMISSIONS_DTYPES)
+
+def _expected_fences(values: np.ndarray, method: str) -> tuple[float, float]:
+    k = preprocess.OUTLIER_THRESHOLDS[method]
+    if method == 'iqr':
+        q1, q3 = np.percentile(values, [25, 75])
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+    if method == 'mad':
+        median = np.median(values)
+        mad = 1.4826 * np.median(np.abs(values - median))
+        return median - k * mad, median + k * mad
+    mean, std = values.mean(), values.std(ddof=1)
+    return mean - k * std, mean + k * std
+
+def test_grouped_quantiles_match_groupby(vehicles):
+    q = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]
+    counts = preprocess.value_counts_by_group(vehicles, 'z (Wh/km)', ['Country', 'year'])
+
+    quantiles = preprocess.grouped_quantiles_from_counts(counts, q)
+    expected = vehicles.astype({'z (Wh/km)': float}).groupby(['Country', 'year'], observed=True)['z (Wh/km)'].quantile(q).unstack()
+
+    assert list(quantiles.index) == list(expected.index)
+    np.testing.assert_array_equal(quantiles.to_numpy(), expected.to_numpy())
+
+def test_grouped_quantiles_single_value_group():
+    counts = pd.Series([1, 4], index=pd.MultiIndex.from_tuples([('a', 5.0), ('b', 7.0)]))
+
+    quantiles = preprocess.grouped_quantiles_from_counts(counts, [0.25, 0.5, 0.75])
+
+    assert quantiles.loc['a'].tolist() == [5.0, 5.0, 5.0]
+    assert quantiles.loc['b'].tolist() == [7.0, 7.0, 7.0]
+
+@pytest.mark.parametrize('method', list(preprocess.OUTLIER_METHODS))
+def test_fences_and_drop_counts(vehicles, method):
+    by = ['Country', 'year']
+    kept, fences = preprocess.filter_outliers(vehicles, 'z (Wh/km)', by, method)
+
+    valid = vehicles.dropna(subset=['z (Wh/km)']).astype({'z (Wh/km)': float})
+    overall = _expected_fences(valid['z (Wh/km)'].to_numpy(), method)
+    dropped_ids = []
+    for (country, year), group in valid.groupby(by, observed=True):
+        values = group['z (Wh/km)'].to_numpy()
+        small = len(values) < preprocess.OUTLIER_MIN_GROUP_ROWS
+        lower, upper = overall if small else _expected_fences(values, method)
+        outliers = (values < lower) | (values > upper)
+
+        row = fences.loc[(country, year)]
+        assert row['rows'] == len(values)
+        np.testing.assert_allclose([row['lower'], row['upper']], [lower, upper], rtol=1e-9)
+        assert row['dropped'] == outliers.sum()
+        dropped_ids += group['ID'][outliers].tolist()
+
+    assert fences.loc[('AT', 2020), 'dropped'] >= 5
+    assert set(vehicles['ID']) - set(kept['ID']) == set(dropped_ids) | set(vehicles['ID'][vehicles['z (Wh/km)'].isna()])
+
+def test_small_groups_get_overall_fences(vehicles):
+    counts = preprocess.value_counts_by_group(vehicles, 'z (Wh/km)', ['Country', 'year'])
+    fences = preprocess.outlier_fences(counts, 'iqr', min_group_rows=100)
+    overall = _expected_fences(vehicles['z (Wh/km)'].dropna().to_numpy(dtype=float), 'iqr')
+
+    small = fences['rows'] < 100
+    assert small.tolist() == [False, False, True, True, True]
+    np.testing.assert_allclose(fences.loc[small, ['lower', 'upper']].to_numpy(), [overall] * 3)
+
+@pytest.mark.parametrize('method', list(preprocess.OUTLIER_METHODS))
+def test_streaming_keeps_same_rows(vehicles, method, tmp_path):
+    src_path, dst_path = tmp_path / 'raw.csv', tmp_path / 'cleaned.csv'
+    vehicles.to_csv(src_path, index=False)
+
+    fences, _ = preprocess.stream_emissions_data(src_path, dst_path, chunksize=100, method=method)
+    streamed = pd.read_csv(dst_path)
+    in_memory = preprocess.preprocess_emissions_data(vehicles, method=method)
+
+    assert streamed['ID'].tolist() == in_memory['ID'].tolist()
+    assert fences['dropped'].sum() == vehicles['z (Wh/km)'].notna().sum() - len(in_memory)
+
+def test_emissions_cube_matches_groupby(vehicles, tmp_path):
+    src_path, dst_path = tmp_path / 'raw.csv', tmp_path / 'cleaned.csv'
+    vehicles.to_csv(src_path, index=False)
+
+    _, counts = preprocess.stream_emissions_data(src_path, dst_path, chunksize=100)
+    cube = preprocess.emissions_cube(counts)
+
+    kept = preprocess.preprocess_emissions_data(vehicles).astype({'Country': str, 'z (Wh/km)': float})
+    grouped = kept.groupby(['Country', 'year'])['z (Wh/km)']
+    expected = pd.DataFrame({
+        'z_sum': grouped.sum(), 'z_count': grouped.count(), 'z_mean': grouped.mean(),
+        'z_p25': grouped.quantile(0.25), 'z_median': grouped.median(), 'z_p75': grouped.quantile(0.75),
+    }).reset_index()
+    expected['Country'] = expected['Country'].replace(preprocess.COUNTRY_NAMES)
+
+    assert cube['Country'].astype(str).tolist() == expected['Country'].tolist()
+    assert cube['year'].tolist() == expected['year'].tolist()
+    np.testing.assert_allclose(cube[expected.columns[2:]].to_numpy(dtype=float), expected[expected.columns[2:]].to_numpy(), rtol=1e-6)
+
+    # Reading the cleaned file back gives the same cube
+    pd.testing.assert_frame_equal(preprocess.build_emissions_cube(dst_path, chunksize=100), cube)